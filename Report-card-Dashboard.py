@@ -1,18 +1,41 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
-from database import create_app, init_db, create_tables
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, Response, stream_with_context
+from database import create_app, init_db, create_tables, register_commands as register_database_commands
+from assets import use_compiled_templates, init_static_assets, register_commands as register_asset_commands
 from models import db, User, Student, Semester
+from querycount import init_query_counter, query_budget
+from metrics import (init_metrics, update_rate_limiter_size, PASSWORD_HASH_SECONDS, LOGIN_FAILURES,
+                     LOGIN_LOCKOUTS, BACKFILL_SEMESTERS, DASHBOARD_CACHE)
+from profiling import init_profiling, profile_span, register_commands as register_profiling_commands
+from seed import register_commands as register_seed_commands
+from analytics import register_commands as register_analytics_commands, register_aggregate_maintenance, cohort_summary
+from ratelimit import create_rate_limiter
+from eventlog import create_event_logger
+from export import register_commands as register_export_commands, FORMATS as EXPORT_FORMATS, iter_report_cards, iter_gzip, parse_timestamp, report_card_page
+from ingest import register_commands as register_ingest_commands, ingest_marks, IngestError
+from rollups import register_rollup_maintenance, register_commands as register_rollup_commands
+from queryplan import register_commands as register_queryplan_commands
+from ranking import RankIndex, CUMULATIVE, register_rank_maintenance, leaderboard
+from cache import LRUCache, DashboardCache, create_shared_backend, register_version_bumps
+from passwords import PasswordHasher, HasherBusy
+from compact import wants_compact, accepts_gzip, compact_response
 import random
+import io
 import hashlib
 import secrets
 import re
-import time
 from functools import wraps
 from datetime import datetime, timedelta
 import os
+import time
 
 # Initialize Flask app with database
+# Importing this module opens no connections and starts no threads, so gunicorn can preload it;
+# per-process work that needs the database happens in warm_up() after the fork
 app = create_app()
 db_instance, migrate = init_db(app)
+use_compiled_templates(app)
+# Fingerprinted static assets with immutable caching (asset_url() in templates)
+init_static_assets(app)
 
 # Production security configurations
 if os.getenv('FLASK_ENV') == 'production':
@@ -23,13 +46,73 @@ if os.getenv('FLASK_ENV') == 'production':
         PERMANENT_SESSION_LIFETIME=timedelta(hours=2),  # Session timeout
     )
 
-# Create tables on first run
+# Dashboard payload cache keyed on each student's database row version, so writes from any process retire entries
+dashboard_cache = DashboardCache(
+    local=LRUCache(maxsize=app.config['DASHBOARD_CACHE_SIZE'], ttl=app.config['DASHBOARD_CACHE_TTL']),
+    shared=create_shared_backend(app.config['DASHBOARD_CACHE_URL']),
+    ttl=app.config['DASHBOARD_CACHE_TTL'],
+)
+register_version_bumps(db.session)
+
+# Cohort aggregates and per-student rollups are updated in the same transaction as semester writes
+register_aggregate_maintenance(db.session)
+register_rollup_maintenance(db.session)
+
+# Security events are queued and written in batches by a background thread
 with app.app_context():
-    create_tables(app, db)
+    security_events = create_event_logger(app, db.engine)
+
+# Per-request SQL statement counting (budgets enforced under TESTING)
+init_query_counter(app, db)
+
+# Prometheus /metrics (route latency, statuses, SQL per request, login internals)
+metrics = init_metrics(app, db)
+
+# Opt-in request profiling (sampled or signed header), slow requests written to PROFILE_DIR
+init_profiling(app, db)
+
+# SGPA rank index, built by warm_up() (or in the background on first use) and kept current by semester writes
+rank_index = RankIndex(refresh_interval=app.config['RANK_INDEX_REFRESH'])
+register_rank_maintenance(db.session, rank_index)
+
+# bcrypt on a bounded pool (cost calibrated by warm_up(), or on first use); saturation sheds logins with a 503
+password_hasher = PasswordHasher(
+    target_ms=app.config['PASSWORD_HASH_TARGET_MS'],
+    rounds=app.config['PASSWORD_HASH_ROUNDS'],
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+    timeout=app.config['PASSWORD_HASH_TIMEOUT'],
+)
+
+def warm_up():
+    """Per-process startup work: fresh connection pools, the rank index and the bcrypt cost (gunicorn post_worker_init)"""
+    password_hasher.calibrate()
+    with app.app_context():
+        # Never reuse pooled connections inherited from a preloading parent process
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+        rank_index.build()
+
+app.extensions['warm_up'] = warm_up
 
 # Constants
 SEMESTER_MONTHS = 6
 MAX_SEMESTERS = 8
+
+# SQL statement budgets per request (enforced in tests)
+# dashboard: one version lookup for the ETag plus the payload load(s) on a cache miss
+DASHBOARD_QUERY_BUDGET = 3
+ANALYTICS_QUERY_BUDGET = 2
+LEADERBOARD_QUERY_BUDGET = 1
+LEADERBOARD_MAX_PER_PAGE = 100
+# report cards: one page of students plus one IN-list load of their semesters and marks
+REPORT_CARDS_QUERY_BUDGET = 2
+REPORT_CARDS_MAX_PER_PAGE = 500
+REPORT_CARDS_MAX_IDENTIFIERS = 1000
+# lookups/updates, one insert per backfilled semester, one batched marks insert,
+# two cohort aggregate upserts, one student rollup update, two cumulative GPA reads for the rank index
+# and one password rehash; a full semester bump needs all of these, so keep two statements of headroom
+LOGIN_QUERY_BUDGET = 12 + MAX_SEMESTERS
 CS_SUBJECTS = ['CS101', 'CS102', 'CS103', 'CS104', 'CS105']
 
 # Security constants
@@ -37,25 +120,21 @@ MIN_PASSWORD_LENGTH = 8
 MAX_LOGIN_ATTEMPTS = 5
 LOCKOUT_DURATION = 300  # 5 minutes in seconds
 
-# Store failed login attempts (in production, use Redis or database)
-failed_attempts = {}
+# Failed login attempts, shared across workers when RATE_LIMIT_URL points at SQLite (opened on first use)
+rate_limiter = create_rate_limiter(app.config['RATE_LIMIT_URL'], LOCKOUT_DURATION, app.config['RATE_LIMIT_MAX_KEYS'])
 
 # Security utility functions
+@PASSWORD_HASH_SECONDS.labels(operation='hash').time()
+@profile_span('password_hash')
 def hash_password(password):
-    """Hash password using SHA-256 with salt"""
-    salt = secrets.token_hex(16)
-    pwd_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-    return f"{salt}:{pwd_hash}"
+    """Hash password with bcrypt at the calibrated cost (raises HasherBusy when saturated)"""
+    return password_hasher.hash(password)
 
+@PASSWORD_HASH_SECONDS.labels(operation='verify').time()
+@profile_span('password_hash')
 def verify_password(stored_password, provided_password):
-    """Verify password against stored hash"""
-    try:
-        salt, stored_hash = stored_password.split(':')
-        pwd_hash = hashlib.sha256((provided_password + salt).encode()).hexdigest()
-        return pwd_hash == stored_hash
-    except ValueError:
-        # Handle legacy plain text passwords (migration case)
-        return stored_password == provided_password
+    """Verify password against a bcrypt hash or a legacy salted SHA-256 / plain text entry"""
+    return password_hasher.verify(stored_password, provided_password)
 
 def validate_password_strength(password):
     """Validate password meets security requirements"""
@@ -100,38 +179,33 @@ def validate_username(username):
     
     return True, "Username is valid"
 
-def check_rate_limit(username):
-    """Check if user has exceeded login attempts"""
-    current_time = time.time()
+def _ip_key(ip):
+    """Rate-limit key for a client address"""
+    return f'ip:{ip}'
+
+def check_rate_limit(username, ip=None):
+    """Check if user (or client IP) has exceeded login attempts"""
+    retry_after = rate_limiter.retry_after(f'user:{username}', MAX_LOGIN_ATTEMPTS)
+    if ip and not retry_after:
+        retry_after = rate_limiter.retry_after(_ip_key(ip), app.config['MAX_LOGIN_ATTEMPTS_PER_IP'])
     
-    if username in failed_attempts:
-        attempts, last_attempt = failed_attempts[username]
-        
-        # Reset attempts if lockout period has passed
-        if current_time - last_attempt > LOCKOUT_DURATION:
-            del failed_attempts[username]
-            return True, "Rate limit reset"
-        
-        if attempts >= MAX_LOGIN_ATTEMPTS:
-            remaining_time = int(LOCKOUT_DURATION - (current_time - last_attempt))
-            return False, f"Too many failed attempts. Try again in {remaining_time} seconds"
+    if retry_after:
+        return False, f"Too many failed attempts. Try again in {retry_after} seconds"
     
     return True, "Rate limit OK"
 
-def record_failed_attempt(username):
+def record_failed_attempt(username, ip=None):
     """Record a failed login attempt"""
-    current_time = time.time()
-    
-    if username in failed_attempts:
-        attempts, _ = failed_attempts[username]
-        failed_attempts[username] = (attempts + 1, current_time)
-    else:
-        failed_attempts[username] = (1, current_time)
+    rate_limiter.hit(f'user:{username}')
+    if ip:
+        rate_limiter.hit(_ip_key(ip))
+    LOGIN_FAILURES.inc()
+    update_rate_limiter_size(rate_limiter)
 
 def clear_failed_attempts(username):
     """Clear failed attempts for successful login"""
-    if username in failed_attempts:
-        del failed_attempts[username]
+    rate_limiter.reset(f'user:{username}')
+    update_rate_limiter_size(rate_limiter)
 
 def validate_semester(semester_str):
     """Validate semester input"""
@@ -141,7 +215,7 @@ def validate_semester(semester_str):
             return True, semester
         else:
             return False, "Semester must be between 1 and 8"
-    except (ValueError, TypeError):
+    except (ValueError, TypeError, OverflowError):
         return False, "Invalid semester format"
 
 def require_login(f):
@@ -153,28 +227,36 @@ def require_login(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def require_staff_token(f):
+    """Decorator to require the staff API bearer token"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        expected = app.config['STAFF_API_TOKEN']
+        auth_header = request.headers.get('Authorization', '')
+        provided = auth_header[len('Bearer '):].strip() if auth_header.startswith('Bearer ') else ''
+        if not expected or not secrets.compare_digest(provided, expected):
+            log_security_event('STAFF_AUTH_FAILED', None, f'Rejected staff API call to {request.path}')
+            return jsonify({'error': 'Authentication required'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+def read_only(f):
+    """Decorator to route a read-only view's queries to the read replica (when configured)"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        # Users who just wrote read from the primary until the replica has caught up
+        if time.time() >= session.get('read_primary_until', 0):
+            db.session.info['use_replica'] = True
+        return f(*args, **kwargs)
+    return decorated_function
+
 def get_client_ip():
-    """Get client IP address for logging"""
-    if request.environ.get('HTTP_X_FORWARDED_FOR') is None:
-        return request.environ['REMOTE_ADDR']
-    else:
-        return request.environ['HTTP_X_FORWARDED_FOR']
+    """Get client IP address for logging and rate limiting (resolved from trusted proxies by ProxyFix)"""
+    return request.remote_addr
 
 def log_security_event(event_type, username=None, details=None):
-    """Log security events (in production, use proper logging)"""
-    timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
-    ip = get_client_ip()
-    
-    log_entry = {
-        'timestamp': timestamp,
-        'event': event_type,
-        'username': username,
-        'ip': ip,
-        'details': details
-    }
-    
-    # In production, write to secure log file or monitoring system
-    print(f"SECURITY LOG: {log_entry}")
+    """Queue a security event for the background writer"""
+    security_events.emit(event_type, username, get_client_ip(), details)
 
 def create_new_semester_data(semester_number):
     """Create new semester data"""
@@ -214,11 +296,78 @@ def get_or_create_student(username):
         return student
     return None
 
+def build_dashboard_payload(username, student, semesters):
+    """Assemble the dashboard payload from already loaded semesters and the student's rollups"""
+    semester_dicts = [sem.to_dict() for sem in semesters]
+    return {
+        'username': username,
+        'current_semester': student.current_semester,
+        'semesters': semester_dicts,
+        'marks': semester_dicts[-1]['marks'],
+        'sgpa': student.latest_sgpa,
+        'cgpa': round(student.cgpa, 2),
+        'total_marks': student.total_marks,
+        'growth': student.get_sgpa_growth(),
+        'rank': {
+            'semester': rank_index.rank(semesters[-1].semester_number, student.latest_sgpa),
+            'cumulative': rank_index.rank(CUMULATIVE, student.cgpa),
+        }
+    }
+
+def dashboard_validators(student_id, representation):
+    """ETag, Last-Modified and the payload cache version for a student's dashboard from one indexed lookup"""
+    version = Student.get_version(student_id)
+    if version is None:
+        return None, None, None
+    updated_at, semester_count, latest_id, latest_updated_at = version
+    
+    # Ranks move as other students' results change, so roll validators once per rank refresh interval
+    refresh = app.config['RANK_INDEX_REFRESH']
+    rank_epoch = int(time.time() // refresh)
+    raw = f'{student_id}:{updated_at}:{semester_count}:{latest_id}:{latest_updated_at}:{rank_epoch}'
+    digest = hashlib.sha1(raw.encode()).hexdigest()[:20]
+    etag = f'{digest}-{representation}'
+    
+    timestamps = [t for t in (updated_at, latest_updated_at) if t is not None]
+    timestamps.append(datetime.utcfromtimestamp(rank_epoch * refresh))
+    return etag, max(timestamps).replace(microsecond=0), digest
+
+def is_not_modified(etag, last_modified):
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against the validators"""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since is not None:
+        return last_modified <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+def list_param(params, name):
+    """A list from the JSON body, or from repeated / comma-separated query arguments"""
+    if name in params:
+        values = params[name]
+        return values if isinstance(values, list) else [values]
+    return [value for arg in request.args.getlist(name) for value in arg.split(',') if value]
+
+def bounded_int(value):
+    """int() of a request value, limited to the signed 64-bit range of the id columns"""
+    number = int(value)
+    if not -2 ** 63 <= number < 2 ** 63:
+        raise OverflowError(f'{number} does not fit in a 64-bit integer')
+    return number
+
+def set_validators(response, etag, last_modified):
+    """Attach validators and require revalidation on every use"""
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
 @app.route('/', methods=['GET'])
 def index():
     return render_template('index.html')
 
 @app.route('/login', methods=['POST'])
+@query_budget(LOGIN_QUERY_BUDGET)
 def login():
     # Get and sanitize inputs
     username = sanitize_input(request.form.get('username'), 30)
@@ -237,8 +386,10 @@ def login():
         return jsonify({'error': username_msg}), 400
     
     # Check rate limiting
-    rate_limit_ok, rate_msg = check_rate_limit(username)
+    client_ip = get_client_ip()
+    rate_limit_ok, rate_msg = check_rate_limit(username, client_ip)
     if not rate_limit_ok:
+        LOGIN_LOCKOUTS.inc()
         log_security_event('RATE_LIMITED', username, rate_msg)
         return jsonify({'error': rate_msg}), 429
     
@@ -250,20 +401,30 @@ def login():
     
     current_semester = int(semester_result)  # Ensure it's an integer
 
-    # Check if user exists
-    user = User.query.filter_by(username=username).first()
+    # Check if user exists (student record loaded in the same statement)
+    user = User.load_with_student(username)
     now = datetime.now()
+    backfilled = 0
     
     if user:
         # Existing user: verify password
         if not verify_password(user.password, password):
-            record_failed_attempt(username)
+            record_failed_attempt(username, client_ip)
             log_security_event('LOGIN_FAILED', username, 'Invalid password')
             return jsonify({'error': 'Invalid username or password.'}), 401
         
         # Clear failed attempts on successful login
         clear_failed_attempts(username)
         
+        # Upgrade legacy SHA-256/plain text entries and bcrypt hashes below the current cost;
+        # the password is already verified, so a saturated pool only postpones this to a later login
+        if password_hasher.needs_rehash(user.password):
+            try:
+                user.password = hash_password(password)
+                log_security_event('PASSWORD_REHASHED', username, 'Password hash upgraded to bcrypt')
+            except HasherBusy:
+                log_security_event('PASSWORD_REHASH_DEFERRED', username, 'Hashing pool saturated')
+        
         # Get or create student record
         student = user.student
         if not student:
@@ -275,13 +436,14 @@ def login():
             historical_semesters = create_historical_semesters(student.id, current_semester)
             for semester in historical_semesters:
                 db.session.add(semester)
+            backfilled = len(historical_semesters)
         else:
             # Update current semester if different
             if student.current_semester != current_semester:
                 student.current_semester = current_semester
                 
                 # Check if we need to add more semesters
-                existing_count = student.semesters.count()
+                existing_count = student.get_semester_count()
                 if current_semester > existing_count:
                     for sem_num in range(existing_count + 1, current_semester + 1):
                         subjects, marks = create_new_semester_data(sem_num)
@@ -295,7 +457,9 @@ def login():
                             new_semester.created_at = datetime.now() - timedelta(days=months_ago * 30)
                         
                         db.session.add(new_semester)
+                        backfilled += 1
         
+        student_id = student.id
         db.session.commit()
         
     else:
@@ -321,55 +485,217 @@ def login():
         historical_semesters = create_historical_semesters(student.id, current_semester)
         for semester in historical_semesters:
             db.session.add(semester)
+        backfilled = len(historical_semesters)
         
+        student_id = student.id
         db.session.commit()
         log_security_event('USER_REGISTERED', username, f'New user registered with semester {current_semester}')
     
+    if backfilled:
+        BACKFILL_SEMESTERS.observe(backfilled)
+    
     # Set secure session
     session['username'] = username
+    session['student_id'] = student_id
     session['login_time'] = datetime.now().isoformat()
     session.permanent = True
+    if app.config['DB_REPLICA_URL']:
+        session['read_primary_until'] = time.time() + app.config['DB_REPLICA_MAX_LAG']
     
     log_security_event('LOGIN_SUCCESS', username, f'Logged in with semester {current_semester}')
     return ('', 204)
 
 @app.route('/dashboard', methods=['GET'])
 @require_login
+@read_only
+@query_budget(DASHBOARD_QUERY_BUDGET)
 def dashboard():
     username = session.get('username')
     username = sanitize_input(username, 30)  # Extra safety
     
-    # Get user and student data
-    user = User.query.filter_by(username=username).first()
-    if not user or not user.student:
-        log_security_event('DASHBOARD_ERROR', username, 'Student data not found')
-        return jsonify({'error': 'Student data not found'}), 404
+    rank_index.maybe_refresh(app)
+    # Compact (columnar, versioned) JSON is chosen by ?format=compact or its Accept media type;
+    # its ETag also depends on whether the body may be gzip-encoded
+    if wants_compact(request):
+        use_gzip = accepts_gzip(request)
+        representation = 'compact-gz' if use_gzip else 'compact'
+    else:
+        representation = 'json' if request.args.get('json') == '1' else 'html'
+    
+    # Answer unchanged refreshes with 304 before any semester rows are loaded
+    student_id = session.get('student_id')
+    etag = last_modified = version = None
+    if student_id:
+        etag, last_modified, version = dashboard_validators(student_id, representation)
+        if etag and is_not_modified(etag, last_modified):
+            log_security_event('DASHBOARD_ACCESS', username, 'Dashboard not modified')
+            return set_validators(app.response_class(status=304), etag, last_modified)
+    
+    # Serve repeat views straight from the payload cache
+    student_data = dashboard_cache.get(student_id, version) if version else None
+    DASHBOARD_CACHE.labels(result='miss' if student_data is None else 'hit').inc()
+    
+    if student_data is None:
+        # Get user, student and semesters in a single round trip
+        user = User.load_with_semesters(username)
+        if not user or not user.student:
+            log_security_event('DASHBOARD_ERROR', username, 'Student data not found')
+            return jsonify({'error': 'Student data not found'}), 404
+        
+        student = user.student
+        semesters = student.semesters
+        
+        if not semesters:
+            log_security_event('DASHBOARD_ERROR', username, 'No semester data found')
+            return jsonify({'error': 'No semester data found'}), 404
+        
+        student_data = build_dashboard_payload(username, student, semesters)
+        if version and student.id == student_id:
+            dashboard_cache.set(student.id, version, student_data)
+        session['student_id'] = student.id
     
-    student = user.student
-    semesters = student.get_all_semesters()
+    log_security_event('DASHBOARD_ACCESS', username, f'Accessed dashboard with {len(student_data["semesters"])} semesters')
     
-    if not semesters:
-        log_security_event('DASHBOARD_ERROR', username, 'No semester data found')
-        return jsonify({'error': 'No semester data found'}), 404
+    if representation.startswith('compact'):
+        response = compact_response(app.response_class, student_data, use_gzip, app.config['DASHBOARD_GZIP_MIN_BYTES'])
+    elif representation == 'json':
+        response = jsonify(student_data)
+    else:
+        response = app.make_response(render_template('dashboard.html', student=student_data))
+    response.vary.add('Accept')
+    if etag:
+        set_validators(response, etag, last_modified)
+    return response
+
+@app.route('/analytics/cohort', methods=['GET'])
+@require_staff_token
+@read_only
+@query_budget(ANALYTICS_QUERY_BUDGET)
+def cohort_analytics():
+    """Cohort-level SGPA and per-subject statistics from the aggregate tables (faculty/staff only)"""
+    summary = cohort_summary()
+    log_security_event('ANALYTICS_ACCESS', None, 'Viewed cohort analytics')
+    return jsonify(summary)
+
+@app.route('/leaderboard', methods=['GET'])
+@require_staff_token
+@read_only
+@query_budget(LEADERBOARD_QUERY_BUDGET)
+def leaderboard_view():
+    """Paginated top-N by SGPA for one semester number or by cumulative GPA"""
+    semester = request.args.get('semester', CUMULATIVE)
+    if semester != CUMULATIVE:
+        semester_valid, semester = validate_semester(semester)
+        if not semester_valid:
+            return jsonify({'error': semester}), 400
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = min(LEADERBOARD_MAX_PER_PAGE, max(1, int(request.args.get('per_page', 20))))
+    except ValueError:
+        return jsonify({'error': 'Invalid page parameters'}), 400
     
-    # Get latest semester data
-    latest_semester = semesters[-1]
+    rank_index.maybe_refresh(app)
+    entries = leaderboard(semester, page, per_page)
+    for entry in entries:
+        entry.update(rank_index.rank(semester, entry['sgpa']) or {})
     
-    # Prepare response data
-    student_data = {
-        'username': username,
-        'current_semester': student.current_semester,
-        'semesters': [sem.to_dict() for sem in semesters],
-        'marks': latest_semester.get_marks(),
-        'sgpa': latest_semester.sgpa,
-        'growth': student.get_sgpa_growth()
-    }
+    return jsonify({'semester': semester, 'page': page, 'per_page': per_page, 'entries': entries})
+
+@app.route('/export', methods=['GET'])
+@require_staff_token
+@read_only
+def export_report_cards():
+    """Stream all report cards as CSV or NDJSON, optionally gzip-compressed"""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'Format must be csv or ndjson'}), 400
+    
+    semester = request.args.get('semester')
+    if semester is not None:
+        semester_valid, semester = validate_semester(semester)
+        if not semester_valid:
+            return jsonify({'error': semester}), 400
     
-    log_security_event('DASHBOARD_ACCESS', username, f'Accessed dashboard with {len(semesters)} semesters')
+    try:
+        since = parse_timestamp(request.args.get('updated_since'))
+        until = parse_timestamp(request.args.get('updated_until'))
+    except ValueError:
+        return jsonify({'error': 'updated_since/updated_until must be ISO-8601 timestamps'}), 400
+    
+    serializer, mimetype = EXPORT_FORMATS[fmt]
+    chunks = serializer(iter_report_cards(semester, since, until))
+    filename = f'report-cards.{fmt}'
+    if request.args.get('gzip') == '1':
+        chunks = iter_gzip(chunks)
+        mimetype, filename = 'application/gzip', filename + '.gz'
+    
+    log_security_event('EXPORT', None, f'Exported report cards as {fmt} (semester={semester}, since={since}, until={until})')
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@app.route('/report-cards', methods=['GET', 'POST'])
+@require_staff_token
+@read_only
+@query_budget(REPORT_CARDS_QUERY_BUDGET)
+def report_cards():
+    """Report cards for many students per response, keyset-paginated by student id"""
+    params = (request.get_json(silent=True) or {}) if request.method == 'POST' else {}
+    if not isinstance(params, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    
+    usernames = list_param(params, 'usernames')
+    for username in usernames:
+        username_valid, username_msg = validate_username(username if isinstance(username, str) else None)
+        if not username_valid:
+            return jsonify({'error': f'Invalid username in usernames: {username_msg}'}), 400
+    try:
+        student_ids = [bounded_int(student_id) for student_id in list_param(params, 'student_ids')]
+        cursor = params.get('cursor', request.args.get('cursor'))
+        cursor = bounded_int(cursor) if cursor is not None else None
+        limit = min(REPORT_CARDS_MAX_PER_PAGE, max(1, int(params.get('limit', request.args.get('limit', 100)))))
+    except (TypeError, ValueError, OverflowError):
+        return jsonify({'error': 'student_ids, cursor and limit must be integers'}), 400
+    if len(usernames) + len(student_ids) > REPORT_CARDS_MAX_IDENTIFIERS:
+        return jsonify({'error': f'At most {REPORT_CARDS_MAX_IDENTIFIERS} usernames/student_ids per request'}), 400
+    
+    current_semester = params.get('current_semester', request.args.get('current_semester'))
+    if current_semester is not None:
+        semester_valid, current_semester = validate_semester(current_semester)
+        if not semester_valid:
+            return jsonify({'error': current_semester}), 400
+    
+    cards, next_cursor = report_card_page(usernames, student_ids, current_semester, cursor, limit)
+    log_security_event('REPORT_CARDS', None, f'Fetched {len(cards)} report cards (cursor={cursor})')
+    return jsonify({'report_cards': cards, 'count': len(cards), 'next_cursor': next_cursor})
+
+@app.route('/ingest/marks', methods=['POST'])
+@require_staff_token
+def ingest_marks_upload():
+    """Upsert marks from a CSV or NDJSON upload (multipart 'file' field or raw body)"""
+    upload = request.files.get('file')
+    if upload is not None:
+        name, raw = upload.filename or '', upload.stream
+        default_format = 'ndjson' if name.endswith(('.ndjson', '.jsonl')) else 'csv'
+    else:
+        raw = io.BufferedReader(request.stream)
+        default_format = 'ndjson' if request.mimetype == 'application/x-ndjson' else 'csv'
+    fmt = request.args.get('format', default_format)
     
-    if request.args.get('json') == '1':
-        return jsonify(student_data)
-    return render_template('dashboard.html', student=student_data)
+    stream = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+    try:
+        report = ingest_marks(stream, fmt, CS_SUBJECTS, MAX_SEMESTERS)
+    except IngestError as error:
+        return jsonify({'error': str(error)}), 400
+    except UnicodeDecodeError:
+        return jsonify({'error': 'Upload must be UTF-8 encoded'}), 400
+    finally:
+        stream.detach()
+    
+    if report['semesters_created'] or report['semesters_updated']:
+        rank_index.build()
+    log_security_event('MARKS_INGEST', None, f"Ingested {report['accepted']}/{report['rows']} mark rows "
+                                             f"({report['rejected']} rejected)")
+    return jsonify(report)
 
 @app.route('/logout', methods=['POST'])
 @require_login
@@ -394,6 +720,22 @@ def internal_error(error):
 def rate_limit_error(error):
     return jsonify({'error': 'Too many requests. Please try again later.'}), 429
 
+@app.errorhandler(HasherBusy)
+def hasher_busy_error(error):
+    db.session.rollback()
+    return jsonify({'error': 'Server is busy. Please try again shortly.'}), 503, {'Retry-After': str(error.retry_after)}
+
+# CLI commands
+register_database_commands(app)
+register_asset_commands(app)
+register_profiling_commands(app)
+register_seed_commands(app, hash_password, CS_SUBJECTS, MAX_SEMESTERS)
+register_analytics_commands(app)
+register_rollup_commands(app)
+register_queryplan_commands(app)
+register_export_commands(app)
+register_ingest_commands(app, CS_SUBJECTS, MAX_SEMESTERS)
+
 # Security headers middleware
 @app.after_request
 def add_security_headers(response):
@@ -411,12 +753,15 @@ if __name__ == '__main__':
     
     if debug_mode:
         print("\n🔒 SECURITY FEATURES ENABLED:")
-        print("✅ Password hashing with SHA-256 + salt")
+        print("✅ Password hashing with bcrypt (calibrated cost, bounded pool)")
         print("✅ Input sanitization and validation")
         print("✅ Rate limiting (5 attempts, 5-min lockout)")
         print("✅ Secure session management")
         print("✅ Security headers (CSP, HSTS, XSS protection)")
         print("✅ Comprehensive logging")
         print("\n🚀 Application starting with security enhancements...\n")
+        # Local development convenience; deployments create the schema with `flask db upgrade`
+        create_tables(app, db)
     
+    warm_up()
     app.run(host='0.0.0.0', port=port, debug=debug_mode)
@@ -0,0 +1,258 @@
+import math
+import time
+
+import click
+from sqlalchemy import event, inspect, select
+
+from models import db, Semester, SemesterMark, CohortSgpaBucket, CohortSubjectMark
+
+PASS_SGPA = 4.0
+PASS_MARK = 40
+SGPA_BUCKETS = 101  # 0.0 - 10.0 in steps of 0.1
+MARK_VALUES = 101   # 0 - 100
+
+
+def sgpa_bucket(sgpa):
+    """Histogram bucket for an SGPA value"""
+    return max(0, min(SGPA_BUCKETS - 1, int(sgpa * 10 + 1e-9)))
+
+
+def _old_value(obj, attr):
+    history = inspect(obj).attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(obj, attr)
+
+
+def new_deltas():
+    """Empty (sgpa, mark) delta accumulators"""
+    return {}, {}
+
+
+def add_sgpa_delta(deltas, semester_number, sgpa, sign):
+    """Add (sign=1) or remove (sign=-1) one semester SGPA"""
+    entry = deltas[0].setdefault((semester_number, sgpa_bucket(sgpa)), [0, 0.0, 0.0])
+    entry[0] += sign
+    entry[1] += sign * sgpa
+    entry[2] += sign * sgpa * sgpa
+
+
+def add_mark_delta(deltas, subject_code, mark, sign):
+    """Add (sign=1) or remove (sign=-1) one subject mark"""
+    key = (subject_code, mark)
+    deltas[1][key] = deltas[1].get(key, 0) + sign
+
+
+def _collect(deltas, obj, sign, old=False):
+    """Add (sign=1) or remove (sign=-1) one object's contribution to the deltas"""
+    value = (lambda attr: _old_value(obj, attr)) if old else (lambda attr: getattr(obj, attr))
+    if isinstance(obj, Semester):
+        sgpa = value('sgpa')
+        if sgpa is None or value('semester_number') is None:
+            return
+        add_sgpa_delta(deltas, value('semester_number'), sgpa, sign)
+    elif isinstance(obj, SemesterMark):
+        if value('mark') is None or not value('subject_code'):
+            return
+        add_mark_delta(deltas, value('subject_code'), value('mark'), sign)
+
+
+def _changed(obj):
+    attrs = ('semester_number', 'sgpa') if isinstance(obj, Semester) else ('subject_code', 'mark')
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in attrs)
+
+
+def dialect_insert(dialect_name):
+    """The dialect's INSERT construct with ON CONFLICT support (imported only for the dialect in use)"""
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _upsert(conn, table, key_columns, rows, increment_columns):
+    """Insert rows or add their values onto existing ones with one executemany"""
+    stmt = dialect_insert(conn.dialect.name)(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={column: table.c[column] + stmt.excluded[column] for column in increment_columns},
+    )
+    conn.execute(stmt, rows)
+
+
+def apply_deltas(conn, deltas):
+    """Write collected deltas to the aggregate tables"""
+    sgpa_deltas, mark_deltas = deltas
+    sgpa_rows = [
+        {'semester_number': number, 'bucket': bucket, 'count': count, 'sgpa_sum': total, 'sgpa_sq_sum': squares}
+        for (number, bucket), (count, total, squares) in sgpa_deltas.items() if count
+    ]
+    mark_rows = [
+        {'subject_code': subject, 'mark': mark, 'count': count}
+        for (subject, mark), count in mark_deltas.items() if count
+    ]
+    if sgpa_rows:
+        _upsert(conn, CohortSgpaBucket.__table__, ['semester_number', 'bucket'], sgpa_rows,
+                ['count', 'sgpa_sum', 'sgpa_sq_sum'])
+    if mark_rows:
+        _upsert(conn, CohortSubjectMark.__table__, ['subject_code', 'mark'], mark_rows, ['count'])
+
+
+def register_aggregate_maintenance(session):
+    """Keep cohort aggregates in step with semester writes, in the same transaction"""
+
+    @event.listens_for(session, 'before_flush')
+    def collect_deltas(sess, flush_context, instances):
+        deltas = sess.info.setdefault('cohort_deltas', new_deltas())
+        for obj in sess.new:
+            if isinstance(obj, (Semester, SemesterMark)):
+                _collect(deltas, obj, 1)
+        for obj in sess.dirty:
+            if isinstance(obj, (Semester, SemesterMark)) and _changed(obj):
+                _collect(deltas, obj, -1, old=True)
+                _collect(deltas, obj, 1)
+        for obj in sess.deleted:
+            if isinstance(obj, (Semester, SemesterMark)):
+                _collect(deltas, obj, -1, old=True)
+
+    @event.listens_for(session, 'after_flush')
+    def write_deltas(sess, flush_context):
+        deltas = sess.info.pop('cohort_deltas', None)
+        if deltas and (deltas[0] or deltas[1]):
+            apply_deltas(sess.connection(), deltas)
+
+
+def _accumulate(total, counts):
+    """Add a bincount result into an accumulator, growing it as needed"""
+    import numpy as np
+    if counts.size > total.size:
+        total = np.pad(total, (0, counts.size - total.size))
+    total[:counts.size] += counts
+    return total
+
+
+def rebuild_cohort_aggregates(batch_size=50000):
+    """Recompute both aggregate tables from scratch with NumPy over column batches"""
+    # Imported here so web workers, which only apply deltas, never load NumPy
+    import numpy as np
+    counts = np.zeros(0)
+    sums = np.zeros(0)
+    squares = np.zeros(0)
+    result = db.session.execute(
+        select(Semester.semester_number, Semester.sgpa).execution_options(yield_per=batch_size)
+    )
+    for partition in result.partitions():
+        numbers, sgpa = zip(*partition)
+        sgpa = np.array(sgpa, dtype=float)
+        buckets = np.clip(np.floor(sgpa * 10 + 1e-9), 0, SGPA_BUCKETS - 1).astype(np.int64)
+        index = np.array(numbers, dtype=np.int64) * SGPA_BUCKETS + buckets
+        counts = _accumulate(counts, np.bincount(index))
+        sums = _accumulate(sums, np.bincount(index, weights=sgpa))
+        squares = _accumulate(squares, np.bincount(index, weights=sgpa * sgpa))
+
+    subject_counts = {}
+    result = db.session.execute(
+        select(SemesterMark.subject_code, SemesterMark.mark).execution_options(yield_per=batch_size)
+    )
+    for partition in result.partitions():
+        codes, marks = zip(*partition)
+        subjects, subject_index = np.unique(np.array(codes), return_inverse=True)
+        index = subject_index * MARK_VALUES + np.clip(np.array(marks, dtype=np.int64), 0, MARK_VALUES - 1)
+        histograms = np.bincount(index, minlength=subjects.size * MARK_VALUES).reshape(-1, MARK_VALUES)
+        for subject, histogram in zip(subjects.tolist(), histograms):
+            subject_counts[subject] = subject_counts.get(subject, 0) + histogram
+
+    sgpa_rows = [
+        {'semester_number': int(index // SGPA_BUCKETS), 'bucket': int(index % SGPA_BUCKETS),
+         'count': int(counts[index]), 'sgpa_sum': float(sums[index]), 'sgpa_sq_sum': float(squares[index])}
+        for index in np.flatnonzero(counts)
+    ]
+    mark_rows = [
+        {'subject_code': subject, 'mark': int(mark), 'count': int(histogram[mark])}
+        for subject, histogram in subject_counts.items()
+        for mark in np.flatnonzero(histogram)
+    ]
+
+    db.session.query(CohortSgpaBucket).delete()
+    db.session.query(CohortSubjectMark).delete()
+    if sgpa_rows:
+        db.session.execute(CohortSgpaBucket.__table__.insert(), sgpa_rows)
+    if mark_rows:
+        db.session.execute(CohortSubjectMark.__table__.insert(), mark_rows)
+    db.session.commit()
+    return len(sgpa_rows), len(mark_rows)
+
+
+def _median(histogram):
+    """Median value from a sorted list of (value, count) pairs"""
+    total = sum(count for _, count in histogram)
+    seen = 0
+    for value, count in histogram:
+        seen += count
+        if seen * 2 >= total:
+            return value
+    return None
+
+
+def _stats(count, total, squares):
+    mean = total / count
+    variance = max(0.0, squares / count - mean * mean)
+    return round(mean, 2), round(math.sqrt(variance), 2)
+
+
+def cohort_summary():
+    """Cohort statistics read entirely from the aggregate tables"""
+    semesters = {}
+    for row in CohortSgpaBucket.query.filter(CohortSgpaBucket.count > 0).order_by(
+            CohortSgpaBucket.semester_number, CohortSgpaBucket.bucket):
+        semesters.setdefault(row.semester_number, []).append(row)
+
+    semester_stats = []
+    for number, rows in semesters.items():
+        count = sum(r.count for r in rows)
+        mean, stddev = _stats(count, sum(r.sgpa_sum for r in rows), sum(r.sgpa_sq_sum for r in rows))
+        histogram = [(r.bucket / 10, r.count) for r in rows]
+        passed = sum(r.count for r in rows if r.bucket >= sgpa_bucket(PASS_SGPA))
+        semester_stats.append({
+            'semester_number': number,
+            'count': count,
+            'mean': mean,
+            'median': _median(histogram),
+            'stddev': stddev,
+            'pass_rate': round(passed / count, 4),
+            'histogram': [{'sgpa': value, 'count': c} for value, c in histogram],
+        })
+
+    subjects = {}
+    for row in CohortSubjectMark.query.filter(CohortSubjectMark.count > 0).order_by(
+            CohortSubjectMark.subject_code, CohortSubjectMark.mark):
+        subjects.setdefault(row.subject_code, []).append((row.mark, row.count))
+
+    subject_stats = []
+    for subject, histogram in subjects.items():
+        count = sum(c for _, c in histogram)
+        mean, stddev = _stats(count, sum(m * c for m, c in histogram), sum(m * m * c for m, c in histogram))
+        subject_stats.append({
+            'subject': subject,
+            'count': count,
+            'mean': mean,
+            'median': _median(histogram),
+            'stddev': stddev,
+            'pass_rate': round(sum(c for m, c in histogram if m >= PASS_MARK) / count, 4),
+            'distribution': [{'mark': m, 'count': c} for m, c in histogram],
+        })
+
+    return {'semesters': semester_stats, 'subjects': subject_stats}
+
+
+def register_commands(app):
+    """Register the rebuild-analytics CLI command on the app"""
+
+    @app.cli.command('rebuild-analytics')
+    @click.option('--batch-size', default=50000, show_default=True, help='Rows fetched per batch.')
+    def rebuild_analytics(batch_size):
+        """Recompute cohort aggregate tables from all semesters."""
+        started = time.perf_counter()
+        sgpa_rows, mark_rows = rebuild_cohort_aggregates(batch_size)
+        click.echo(f'Rebuilt {sgpa_rows} SGPA buckets and {mark_rows} subject mark counts '
+                   f'in {time.perf_counter() - started:.1f}s')
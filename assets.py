@@ -0,0 +1,226 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import urllib.request
+
+import click
+from flask import abort, request, send_from_directory, url_for
+from jinja2 import ChoiceLoader, ModuleLoader
+
+ASSET_URL_PREFIX = '/assets'
+ASSET_MAX_AGE = 365 * 24 * 3600
+MANIFEST_NAME = 'manifest.json'
+DIGEST_LENGTH = 12
+# Text formats worth a precompressed copy, and the size below which gzip doesn't pay off
+COMPRESSIBLE = {'.css', '.js', '.json', '.map', '.svg', '.txt', '.html'}
+MIN_COMPRESS_BYTES = 256
+# Quoted strings (kept verbatim) and comments (dropped) in a stylesheet
+CSS_STRING_OR_COMMENT = re.compile(r'''("(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')|/\*.*?\*/''', re.S)
+# Stands in for each string while the rest is squeezed; no whitespace or punctuation rule touches it
+CSS_STRING_MARK = '\0'
+# Third-party assets served from static/vendor once fetched (`flask build-assets --fetch-vendor`),
+# from the CDN until then
+VENDOR_ASSETS = {
+    'vendor/chart.umd.min.js': 'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js',
+}
+
+
+def use_compiled_templates(app):
+    """Load templates from COMPILED_TEMPLATES_DIR when it has been built
+
+    Compiled templates are plain Python modules, so a fresh worker imports
+    them instead of lexing, parsing and compiling every template on first
+    render. Templates missing from the build still load from source.
+    """
+    directory = app.config['COMPILED_TEMPLATES_DIR']
+    if not directory or not os.path.isdir(directory):
+        return False
+    loader = ChoiceLoader([ModuleLoader(directory), app.create_global_jinja_loader()])
+    app.jinja_options = {**app.jinja_options, 'loader': loader}
+    return True
+
+
+def compile_templates(app, target):
+    """Compile every template under templates/ into `target`, returns the number compiled"""
+    # Always compile from source, even if this app is already serving a previous build
+    env = app.jinja_env.overlay(loader=app.create_global_jinja_loader())
+    names = env.list_templates()
+    shutil.rmtree(target, ignore_errors=True)
+    os.makedirs(target)
+    env.compile_templates(target, zip=None, ignore_errors=False)
+    return len(names)
+
+
+def minify_css(text):
+    """Drop comments and insignificant whitespace from a stylesheet, leaving quoted strings untouched"""
+    strings = []
+
+    def set_aside(match):
+        if match.group(1) is None:
+            return ' '
+        strings.append(match.group(1))
+        return CSS_STRING_MARK
+
+    text = CSS_STRING_OR_COMMENT.sub(set_aside, text.replace(CSS_STRING_MARK, ''))
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,])\s*', r'\1', text)
+    text = re.sub(r':\s+', ':', text)
+    text = text.replace(';}', '}').strip()
+    restored = iter(strings)
+    return re.sub(CSS_STRING_MARK, lambda _: next(restored), text)
+
+
+def minify_js(text):
+    """Minify a script with rjsmin when it is installed (unchanged otherwise; gzip does most of the work)"""
+    try:
+        import rjsmin
+    except ImportError:
+        return text
+    return rjsmin.jsmin(text)
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def fingerprinted_name(logical, content):
+    """`dir/name.<digest>.ext` for a logical asset path and its built content"""
+    stem, ext = os.path.splitext(logical)
+    return f'{stem}.{hashlib.sha256(content).hexdigest()[:DIGEST_LENGTH]}{ext}'
+
+
+def _static_files(static_folder):
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(files):
+            if not name.startswith('.'):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, static_folder).replace(os.sep, '/'), path
+
+
+def build_static_assets(app, target):
+    """Minify, fingerprint and gzip every file under static/ into `target`, returns the manifest
+
+    Already minified files (`*.min.*`) are copied as they are. Each built
+    file's name carries a digest of its content, so it can be cached forever
+    and a changed file gets a new URL.
+    """
+    shutil.rmtree(target, ignore_errors=True)
+    os.makedirs(target)
+    manifest = {'files': {}, 'gzip': []}
+    for logical, path in _static_files(app.static_folder):
+        with open(path, 'rb') as source:
+            content = source.read()
+        ext = os.path.splitext(logical)[1].lower()
+        if ext in MINIFIERS and '.min.' not in os.path.basename(logical):
+            content = MINIFIERS[ext](content.decode('utf-8')).encode('utf-8')
+        built = fingerprinted_name(logical, content)
+        built_path = os.path.join(target, built)
+        os.makedirs(os.path.dirname(built_path), exist_ok=True)
+        with open(built_path, 'wb') as output:
+            output.write(content)
+        if ext in COMPRESSIBLE and len(content) >= MIN_COMPRESS_BYTES:
+            # mtime=0 keeps the .gz byte-identical across builds of the same content
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+            if len(compressed) < len(content):
+                with open(built_path + '.gz', 'wb') as output:
+                    output.write(compressed)
+                manifest['gzip'].append(built)
+        manifest['files'][logical] = built
+    with open(os.path.join(target, MANIFEST_NAME), 'w') as output:
+        json.dump(manifest, output, indent=2, sort_keys=True)
+    return manifest
+
+
+def fetch_vendor_assets(app):
+    """Download pinned third-party assets missing from static/, returns the paths written"""
+    written = []
+    for logical, url in VENDOR_ASSETS.items():
+        path = os.path.join(app.static_folder, logical)
+        if os.path.exists(path):
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as response:
+            content = response.read()
+        with open(path, 'wb') as output:
+            output.write(content)
+        written.append(path)
+    return written
+
+
+def load_manifest(directory):
+    """The asset manifest written by `flask build-assets`, or None when assets aren't built"""
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME)) as manifest:
+            return json.load(manifest)
+    except FileNotFoundError:
+        return None
+
+
+def init_static_assets(app):
+    """Serve built assets under /assets with year-long immutable caching and the asset_url template helper
+
+    Without a build (local development) asset_url() falls back to the
+    plain /static URLs, and vendored files that were never fetched to
+    their CDN URL. The manifest is read once per process, so workers
+    pick up a new build on restart.
+    """
+    directory = app.config['STATIC_BUILD_DIR']
+    manifest = (load_manifest(directory) if directory else None) or {'files': {}, 'gzip': []}
+    files = manifest['files']
+    built = set(files.values())
+    precompressed = set(manifest['gzip'])
+
+    @app.template_global()
+    def asset_url(logical):
+        """URL for a static asset: fingerprinted when built, plain /static or the vendor CDN otherwise"""
+        if logical in files:
+            return f'{ASSET_URL_PREFIX}/{files[logical]}'
+        if logical in VENDOR_ASSETS and not os.path.exists(os.path.join(app.static_folder, logical)):
+            return VENDOR_ASSETS[logical]
+        return url_for('static', filename=logical)
+
+    @app.route(f'{ASSET_URL_PREFIX}/<path:filename>', methods=['GET'])
+    def fingerprinted_asset(filename):
+        if filename not in built:
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        use_gzip = filename in precompressed and request.accept_encodings['gzip'] > 0
+        response = send_from_directory(directory, filename + '.gz' if use_gzip else filename,
+                                       mimetype=mimetype, max_age=ASSET_MAX_AGE)
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+        if filename in precompressed:
+            response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    return files
+
+
+def register_commands(app):
+    """Register the compile-templates and build-assets CLI commands on the app"""
+
+    @app.cli.command('compile-templates')
+    @click.option('--output', type=click.Path(file_okay=False), help='Target directory (default: COMPILED_TEMPLATES_DIR).')
+    def compile_templates_command(output):
+        """Precompile Jinja templates to Python modules (run at build time, after every template change)."""
+        target = output or app.config['COMPILED_TEMPLATES_DIR']
+        count = compile_templates(app, target)
+        click.echo(f'Compiled {count} templates into {target}')
+
+    @app.cli.command('build-assets')
+    @click.option('--output', type=click.Path(file_okay=False), help='Target directory (default: STATIC_BUILD_DIR).')
+    @click.option('--fetch-vendor', is_flag=True, help='Download pinned third-party assets (Chart.js) into static/vendor first.')
+    def build_assets_command(output, fetch_vendor):
+        """Minify, fingerprint and gzip static files for long-lived caching (run at build time)."""
+        if fetch_vendor:
+            for path in fetch_vendor_assets(app):
+                click.echo(f'Fetched {path}')
+        target = output or app.config['STATIC_BUILD_DIR']
+        manifest = build_static_assets(app, target)
+        click.echo(f"Built {len(manifest['files'])} assets ({len(manifest['gzip'])} precompressed) into {target}")
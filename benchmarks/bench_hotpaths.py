@@ -0,0 +1,356 @@
+"""Benchmarks for the /login and /dashboard hot paths
+
+Runs parameterized scenarios against the app in-process (Flask test
+client) or against a locally started gunicorn, and reports throughput,
+latency percentiles, SQL statements per request and peak RSS.
+
+Usage:
+    python benchmarks/bench_hotpaths.py --cohort 0 --cohort 10000 --output results.json
+    python benchmarks/bench_hotpaths.py --baseline results.json --max-regression 15
+    python benchmarks/bench_hotpaths.py --gunicorn --workers 4
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+from http.cookiejar import CookieJar
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'Passw0rdBench1'
+SCENARIOS = ['cold_login', 'returning_login', 'semester_bump', 'dashboard_json', 'dashboard_json_uncached',
+             'dashboard_json_not_modified', 'dashboard_compact', 'dashboard_compact_uncached', 'dashboard_html']
+# What scripts.js sends for the dashboard (compact format, gzip when large enough)
+COMPACT_HEADERS = {'Accept': 'application/vnd.report-card.dashboard.v1+json', 'Accept-Encoding': 'gzip'}
+# Metrics where a higher value is a regression
+LOWER_IS_BETTER = ['p50_ms', 'p95_ms', 'p99_ms', 'sql_per_request', 'bytes_per_request']
+
+
+def load_app(database_url):
+    """Import the application module against the given database and create its tables"""
+    os.environ['DATABASE_URL'] = database_url
+    sys.path.insert(0, ROOT)
+    spec = importlib.util.spec_from_file_location('report_card_app', os.path.join(ROOT, 'Report-card-Dashboard.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.create_tables(module.app, module.db)
+    return module
+
+
+def seed_cohort(module, students, seed=42, prefix='cohort'):
+    """Populate the database with a synthetic cohort before measuring
+
+    Usernames are numbered after the users already seeded with `prefix`,
+    so topping up an existing database (check_query_plans.py
+    --database-url) adds students rather than colliding with them.
+    """
+    import seed as seeder
+
+    if not students:
+        return
+    with module.app.app_context():
+        now = datetime.utcnow()
+        password_hash = module.hash_password(PASSWORD)
+        existing = seeder.User.query.filter(seeder.User.username.like(f'{prefix}%')).count()
+        # write_chunk derives ids from the username number; shift the bases so ids stay dense
+        user_base = seeder._next_id(seeder.User) - existing
+        student_base = seeder._next_id(seeder.Student) - existing
+        semester_base = seeder._next_id(seeder.Semester)
+        offset = 0
+        for index, start in enumerate(range(existing, existing + students, 5000)):
+            chunk = seeder.generate_chunk(seed, index, start, min(5000, existing + students - start),
+                                          module.CS_SUBJECTS, module.MAX_SEMESTERS, now)
+            chunk['semester_offset'] = offset
+            offset += len(chunk['student_index'])
+            seeder.write_chunk(chunk, prefix, password_hash, user_base, student_base, semester_base)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(name, cohort, durations, statements, elapsed, response_bytes):
+    durations = sorted(durations)
+    return {
+        'scenario': name,
+        'cohort': cohort,
+        'requests': len(durations),
+        'throughput_rps': round(len(durations) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(durations, 50) * 1000, 3),
+        'p95_ms': round(percentile(durations, 95) * 1000, 3),
+        'p99_ms': round(percentile(durations, 99) * 1000, 3),
+        'sql_per_request': round(statements / len(durations), 2) if statements is not None else None,
+        'bytes_per_request': round(response_bytes / len(durations), 1),
+    }
+
+
+class InProcessClient:
+    """Drives the app through the Flask test client and counts SQL statements"""
+
+    def __init__(self, module):
+        from sqlalchemy import event
+
+        self.module = module
+        self.statements = 0
+        self.response_bytes = 0
+        with module.app.app_context():
+            event.listen(module.db.engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.statements += 1
+
+    def session(self):
+        return self.module.app.test_client()
+
+    def login(self, client, username, semester):
+        return client.post('/login', data={'username': username, 'password': PASSWORD,
+                                           'current_semester': str(semester)}).status_code
+
+    def get(self, client, path, headers=None):
+        response = client.get(path, headers=headers)
+        # Body as sent on the wire (the test client doesn't decode Content-Encoding)
+        self.response_bytes += len(response.data)
+        return response.status_code
+
+    def etag(self, client, path):
+        return client.get(path).headers.get('ETag')
+
+    def clear_cache(self):
+        self.module.dashboard_cache.local.clear()
+
+
+class HTTPClient:
+    """Drives a running server over HTTP (SQL statements are not observable)"""
+
+    statements = None
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.response_bytes = 0
+
+    def session(self):
+        return urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    def _open(self, opener, path, data=None, headers=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers or {})
+        try:
+            with opener.open(request) as response:
+                self.response_bytes += len(response.read())
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+
+    def login(self, opener, username, semester):
+        return self._open(opener, '/login', {'username': username, 'password': PASSWORD,
+                                             'current_semester': str(semester)})
+
+    def get(self, opener, path, headers=None):
+        return self._open(opener, path, headers=headers)
+
+    def etag(self, opener, path):
+        with opener.open(self.base_url + path) as response:
+            response.read()
+            return response.headers.get('ETag')
+
+    def clear_cache(self):
+        pass
+
+
+def run_scenario(client, name, cohort, iterations, run_id):
+    """Run one scenario and return its summary (setup work is not timed)"""
+    prefix = f'b{run_id}{name[:3]}'
+    warm = None
+    if name in ('returning_login', 'dashboard_json', 'dashboard_json_uncached', 'dashboard_json_not_modified',
+                'dashboard_compact', 'dashboard_compact_uncached', 'dashboard_html'):
+        warm = client.session()
+        client.login(warm, f'{prefix}warm', 4)
+    if name == 'dashboard_json_not_modified':
+        etag = client.etag(warm, '/dashboard?json=1')
+
+    durations = []
+    statements = 0
+    before_bytes = client.response_bytes
+    for i in range(iterations):
+        if name == 'cold_login':
+            session = client.session()
+            request = lambda: client.login(session, f'{prefix}{i}', 4)
+        elif name == 'returning_login':
+            request = lambda: client.login(warm, f'{prefix}warm', 4)
+        elif name == 'semester_bump':
+            session = client.session()
+            client.login(session, f'{prefix}{i}', 1)
+            request = lambda: client.login(session, f'{prefix}{i}', 8)
+        elif name == 'dashboard_json_uncached':
+            client.clear_cache()
+            request = lambda: client.get(warm, '/dashboard?json=1')
+        elif name == 'dashboard_json':
+            request = lambda: client.get(warm, '/dashboard?json=1')
+        elif name == 'dashboard_json_not_modified':
+            request = lambda: client.get(warm, '/dashboard?json=1', {'If-None-Match': etag})
+        elif name == 'dashboard_compact_uncached':
+            client.clear_cache()
+            request = lambda: client.get(warm, '/dashboard', COMPACT_HEADERS)
+        elif name == 'dashboard_compact':
+            request = lambda: client.get(warm, '/dashboard', COMPACT_HEADERS)
+        else:
+            request = lambda: client.get(warm, '/dashboard')
+
+        before = client.statements
+        t0 = time.perf_counter()
+        status = request()
+        durations.append(time.perf_counter() - t0)
+        if before is not None:
+            statements += client.statements - before
+        if status >= 400:
+            raise RuntimeError(f'{name}: request {i} failed with HTTP {status}')
+
+    return summarize(name, cohort, durations, statements if client.statements is not None else None,
+                     sum(durations), client.response_bytes - before_bytes)
+
+
+def peak_rss_mb(server=None):
+    """Peak resident set size of this process (and server workers when known)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    if server is not None:
+        for pid in _child_pids(server.pid) + [server.pid]:
+            try:
+                with open(f'/proc/{pid}/status') as status:
+                    for line in status:
+                        if line.startswith('VmHWM:'):
+                            peak = max(peak, int(line.split()[1]) / 1024)
+            except OSError:
+                pass
+    return round(peak, 1)
+
+
+def _child_pids(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            return [int(child) for child in children.read().split()]
+    except OSError:
+        return []
+
+
+def start_gunicorn(database_url, workers):
+    """Start gunicorn on a free local port and wait until it answers"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    env = dict(os.environ, DATABASE_URL=database_url)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+         'Report-card-Dashboard:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(base_url + '/').read()
+            return server, base_url
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError('gunicorn did not start')
+
+
+def compare(results, baseline, max_regression):
+    """Return a list of regressions against a stored baseline"""
+    previous = {(r['scenario'], r['cohort']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get((result['scenario'], result['cohort']))
+        if not old:
+            continue
+        for metric in LOWER_IS_BETTER + ['throughput_rps']:
+            new_value, old_value = result.get(metric), old.get(metric)
+            if not new_value or not old_value:
+                continue
+            change = (new_value - old_value) / old_value * 100
+            if metric == 'throughput_rps':
+                change = -change
+            if change > max_regression:
+                regressions.append(f"{result['scenario']}[cohort={result['cohort']}] {metric}: "
+                                   f"{old_value} -> {new_value} ({change:+.1f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='Scenario(s) to run (default: all)')
+    parser.add_argument('--cohort', action='append', type=int, help='Pre-seeded cohort size(s) (default: 0)')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--gunicorn', action='store_true', help='Run against a locally started gunicorn')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='Compare against a previously saved results file')
+    parser.add_argument('--max-regression', type=float, default=10.0, help='Allowed regression in percent')
+    args = parser.parse_args(argv)
+
+    scenarios = args.scenario or SCENARIOS
+    results = []
+    for cohort in args.cohort or [0]:
+        workdir = tempfile.mkdtemp(prefix='bench-')
+        database_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        module = load_app(database_url)
+        seed_cohort(module, cohort)
+        module.warm_up()
+
+        server = None
+        if args.gunicorn:
+            server, base_url = start_gunicorn(database_url, args.workers)
+            client = HTTPClient(base_url)
+        else:
+            client = InProcessClient(module)
+        try:
+            for run_id, name in enumerate(scenarios):
+                result = run_scenario(client, name, cohort, args.iterations, run_id)
+                result['peak_rss_mb'] = peak_rss_mb(server)
+                results.append(result)
+                print(f"{name:<24} cohort={cohort:<8} {result['throughput_rps']:>9} req/s  "
+                      f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms  "
+                      f"sql/req={result['sql_per_request']}  bytes/req={result['bytes_per_request']}  rss={result['peak_rss_mb']}MB")
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+        sys.path.remove(ROOT)
+
+    report = {
+        'created_at': datetime.utcnow().isoformat(),
+        'mode': 'gunicorn' if args.gunicorn else 'in-process',
+        'python': platform.python_version(),
+        'iterations': args.iterations,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.max_regression)
+        if regressions:
+            print('\nRegressions over baseline:')
+            for regression in regressions:
+                print(f'  {regression}')
+            return 1
+        print('\nNo regressions over baseline.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
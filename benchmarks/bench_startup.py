@@ -0,0 +1,190 @@
+"""Startup benchmark: import-to-first-response for a fresh process
+
+Each run starts a new interpreter that imports the application module,
+runs the per-process warm-up and serves its first requests through the
+Flask test client. That is what every new gunicorn worker (without
+preloading) and every autoscaled instance pays before it takes traffic.
+Runs are repeated with templates loaded from source and precompiled
+(`flask compile-templates`). With --gunicorn, the time from spawning
+gunicorn to its first successful HTTP response is measured too.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 20 --output startup.json
+    python benchmarks/bench_startup.py --runs 20 --baseline startup.json --max-regression 15
+    python benchmarks/bench_startup.py --gunicorn --workers 4
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+from bench_hotpaths import ROOT, PASSWORD, percentile, start_gunicorn
+
+USERNAME = 'startupbench'
+# Timed stages reported by the child process, in order
+STAGES = ['import_ms', 'warm_up_ms', 'first_index_ms', 'first_login_ms', 'first_dashboard_ms', 'total_ms']
+METRICS = STAGES + ['process_ms']
+
+# Runs in a fresh interpreter: argv[1] is the repository root, argv[2] 'setup' or 'measure'
+CHILD = r'''
+import time
+started = time.perf_counter()
+import importlib.util, json, os, sys
+sys.path.insert(0, sys.argv[1])
+spec = importlib.util.spec_from_file_location('report_card_app', os.path.join(sys.argv[1], 'Report-card-Dashboard.py'))
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+imported = time.perf_counter()
+
+if sys.argv[2] == 'setup':
+    import assets
+    module.create_tables(module.app, module.db)
+    assets.compile_templates(module.app, os.environ['BENCH_COMPILED_DIR'])
+    client = module.app.test_client()
+    client.post('/login', data={'username': os.environ['BENCH_USERNAME'], 'password': os.environ['BENCH_PASSWORD'],
+                                'current_semester': '8'})
+    module.security_events.close()
+    sys.exit(0)
+
+module.warm_up()
+warmed = time.perf_counter()
+client = module.app.test_client()
+stamps = []
+for method, path, data in [('get', '/', None),
+                           ('post', '/login', {'username': os.environ['BENCH_USERNAME'],
+                                               'password': os.environ['BENCH_PASSWORD'], 'current_semester': '8'}),
+                           ('get', '/dashboard', None)]:
+    response = getattr(client, method)(path, data=data)
+    assert response.status_code < 400, (path, response.status_code)
+    stamps.append(time.perf_counter())
+module.security_events.close()
+previous = [warmed] + stamps[:-1]
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'warm_up_ms': (warmed - imported) * 1000,
+    'first_index_ms': (stamps[0] - previous[0]) * 1000,
+    'first_login_ms': (stamps[1] - previous[1]) * 1000,
+    'first_dashboard_ms': (stamps[2] - previous[2]) * 1000,
+    'total_ms': (stamps[2] - started) * 1000,
+}))
+'''
+
+
+def run_child(mode, env):
+    """Run the child in a fresh interpreter, returning its timings and the process wall time"""
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', CHILD, ROOT, mode], env=env, cwd=ROOT,
+                               capture_output=True, text=True)
+    elapsed = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f'{mode} run failed:\n{completed.stderr}')
+    if mode == 'setup':
+        return None
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    timings['process_ms'] = elapsed
+    return timings
+
+
+def summarize(name, runs):
+    result = {'scenario': name, 'runs': len(runs)}
+    for metric in METRICS:
+        values = sorted(run[metric] for run in runs)
+        result[f'{metric}_p50'] = round(percentile(values, 50), 2)
+        result[f'{metric}_p95'] = round(percentile(values, 95), 2)
+    return result
+
+
+def time_gunicorn(database_url, workers):
+    """Milliseconds from spawning gunicorn to its first successful response"""
+    started = time.perf_counter()
+    server, base_url = start_gunicorn(database_url, workers)
+    try:
+        urllib.request.urlopen(base_url + '/').read()
+        return (time.perf_counter() - started) * 1000
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def compare(results, baseline, max_regression):
+    """Return a list of p50 regressions against a stored baseline"""
+    previous = {r['scenario']: r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get(result['scenario'])
+        if not old:
+            continue
+        for key, new_value in result.items():
+            old_value = old.get(key)
+            if not key.endswith('_p50') or not new_value or not old_value:
+                continue
+            change = (new_value - old_value) / old_value * 100
+            if change > max_regression:
+                regressions.append(f"{result['scenario']} {key}: {old_value} -> {new_value} ({change:+.1f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='Fresh processes per scenario')
+    parser.add_argument('--gunicorn', action='store_true', help='Also time gunicorn from spawn to first response')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='Compare against a previously saved results file')
+    parser.add_argument('--max-regression', type=float, default=10.0, help='Allowed p50 regression in percent')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-startup-')
+    database_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    compiled_dir = os.path.join(workdir, 'templates')
+    env = dict(os.environ, DATABASE_URL=database_url, BENCH_USERNAME=USERNAME, BENCH_PASSWORD=PASSWORD,
+               BENCH_COMPILED_DIR=compiled_dir, COMPILED_TEMPLATES_DIR='')
+    env.pop('FLASK_RUN_FROM_CLI', None)
+    run_child('setup', env)
+
+    results = []
+    for name, templates in [('source_templates', ''), ('compiled_templates', compiled_dir)]:
+        runs = [run_child('measure', dict(env, COMPILED_TEMPLATES_DIR=templates)) for _ in range(args.runs)]
+        result = summarize(name, runs)
+        results.append(result)
+        print(f"{name:<20} import={result['import_ms_p50']}ms warm_up={result['warm_up_ms_p50']}ms "
+              f"first /={result['first_index_ms_p50']}ms first dashboard={result['first_dashboard_ms_p50']}ms "
+              f"import-to-first-dashboard={result['total_ms_p50']}ms process={result['process_ms_p50']}ms")
+
+    if args.gunicorn:
+        timings = sorted(time_gunicorn(database_url, args.workers) for _ in range(args.runs))
+        result = {'scenario': f'gunicorn_{args.workers}_workers', 'runs': len(timings),
+                  'ready_ms_p50': round(percentile(timings, 50), 2), 'ready_ms_p95': round(percentile(timings, 95), 2)}
+        results.append(result)
+        print(f"{result['scenario']:<20} spawn-to-first-response={result['ready_ms_p50']}ms")
+
+    report = {
+        'created_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'runs': args.runs,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.max_regression)
+        if regressions:
+            print('\nRegressions over baseline:')
+            for regression in regressions:
+                print(f'  {regression}')
+            return 1
+        print('\nNo regressions over baseline.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""Query-plan regression check for the hot queries (exits non-zero on a full table scan)
+
+Seeds a cohort into a throwaway SQLite database (or tops up the database
+given with --database-url, e.g. a disposable PostgreSQL), refreshes the
+planner statistics and EXPLAINs every statement the login, dashboard,
+report-card, rollup and leaderboard paths send. Run it in CI after any
+change to models, queries or migrations.
+
+Usage:
+    python benchmarks/check_query_plans.py --students 20000
+    python benchmarks/check_query_plans.py --database-url postgresql://localhost/plans --verbose
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from bench_hotpaths import load_app, seed_cohort
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=20000, help='Cohort size to seed up to')
+    parser.add_argument('--database-url', help='Database to check (default: a temporary SQLite file)')
+    parser.add_argument('--verbose', action='store_true', help='Print every plan, not only regressions')
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='query-plans-'), 'plans.db')}"
+    module = load_app(database_url)
+    import queryplan
+
+    with module.app.app_context():
+        existing = module.db.session.scalar(module.db.select(module.db.func.count(module.Student.id)))
+    seed_cohort(module, max(0, args.students - existing))
+
+    with module.app.app_context():
+        results = queryplan.check_query_plans(analyze=True)
+        dialect = module.db.engine.dialect.name
+    module.security_events.close()
+
+    for line in queryplan.report_lines(results, args.verbose):
+        print(line)
+    failures = sum(1 for result in results if result['scans'])
+    if failures:
+        print(f'\n{failures} of {len(results)} hot statements do full table scans ({dialect})')
+        return 1
+    print(f'All {len(results)} hot statements use indexes ({dialect}, {max(existing, args.students)} students)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import event
+
+
+class LRUCache:
+    """In-process LRU cache with per-entry TTL and a hard size bound"""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return a cached value or None if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting the least recently used entries when full"""
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove a key if present"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LocalSharedBackend:
+    """Local stand-in for a shared cache backend (e.g. Redis)
+
+    Any object exposing get/set/delete with these semantics can be
+    plugged into DashboardCache as the shared tier.
+    """
+
+    def __init__(self):
+        self._store = LRUCache(maxsize=100000)
+
+    def get(self, key):
+        return self._store.get(key)
+
+    def set(self, key, value, ttl=None):
+        self._store.set(key, value, ttl)
+
+    def delete(self, key):
+        self._store.delete(key)
+
+
+class RedisBackend:
+    """Shared backend on top of a Redis server (optional dependency)"""
+
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        value = self._client.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        self._client.set(key, json.dumps(value), ex=int(ttl) if ttl else None)
+
+    def delete(self, key):
+        self._client.delete(key)
+
+
+def create_shared_backend(url):
+    """Create the shared cache tier from a URL ('local' or redis://...)"""
+    if not url:
+        return None
+    if url == 'local':
+        return LocalSharedBackend()
+    return RedisBackend(url)
+
+
+class DashboardCache:
+    """Two-tier cache for assembled dashboard payloads
+
+    Entries are keyed by student id and the student's row version as read
+    from the database (the same version the dashboard ETag is built from).
+    A commit from any process (another worker, `flask ingest-marks`)
+    changes the version, so stale payloads are never read again and simply
+    age out of both tiers; no per-process invalidation state is needed.
+    """
+
+    def __init__(self, local=None, shared=None, ttl=300):
+        self.local = local if local is not None else LRUCache(ttl=ttl)
+        self.shared = shared
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(student_id, version):
+        return f'dashboard:{student_id}:{version}'
+
+    def get(self, student_id, version):
+        """Return the payload cached for this version of the student, or None"""
+        key = self._key(student_id, version)
+        payload = self.local.get(key)
+        if payload is None and self.shared is not None:
+            payload = self.shared.get(key)
+            if payload is not None:
+                self.local.set(key, payload)
+        return payload
+
+    def set(self, student_id, version, payload):
+        """Cache the payload for this version of the student"""
+        key = self._key(student_id, version)
+        self.local.set(key, payload)
+        if self.shared is not None:
+            self.shared.set(key, payload, self.ttl)
+
+
+def register_version_bumps(session):
+    """Touch a semester's updated_at when only its marks change, so the student's row version moves
+
+    Semester and student writes already change the version (updated_at,
+    semester count, latest id); mark rows carry no timestamp of their own.
+    """
+    from models import SemesterMark
+
+    @event.listens_for(session, 'before_flush')
+    def touch_semesters(sess, flush_context, instances):
+        now = datetime.utcnow()
+        changed = list(sess.new) + [obj for obj in sess.dirty if sess.is_modified(obj)] + list(sess.deleted)
+        for obj in changed:
+            if isinstance(obj, SemesterMark) and obj.semester is not None and obj.semester not in sess.new:
+                obj.semester.updated_at = now
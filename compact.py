@@ -0,0 +1,90 @@
+import gzip
+import json
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+COMPACT_VERSION = 1
+COMPACT_MEDIA_TYPE = f'application/vnd.report-card.dashboard.v{COMPACT_VERSION}+json'
+COMPACT_FORMAT_PARAM = 'compact'
+# Bodies that already fit in one TCP segment gain nothing from compression
+GZIP_MIN_BYTES = 1400
+GZIP_LEVEL = 5
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+
+def dumps(obj):
+    """Serialize to compact UTF-8 JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def epoch_seconds(timestamp):
+    """Integer UTC epoch seconds for a naive UTC ISO-8601 timestamp"""
+    return int((datetime.fromisoformat(timestamp) - UNIX_EPOCH).total_seconds())
+
+
+def compact_dashboard(payload):
+    """Columnar form of a dashboard payload: every value once, subjects as a shared dictionary
+
+    `semester_subjects[i][j]` indexes `subjects` for `marks[i][j]`; `sgpa`,
+    `totals` and `created_at` hold one entry per semester in dashboard order.
+    The latest SGPA, latest marks and growth series are the last entries /
+    the whole `sgpa` column, so they aren't sent separately.
+    """
+    subjects, subject_index = [], {}
+    semester_subjects, marks, sgpa, totals, created_at = [], [], [], [], []
+    for semester in payload['semesters']:
+        positions = []
+        for code in semester['subjects']:
+            if code not in subject_index:
+                subject_index[code] = len(subjects)
+                subjects.append(code)
+            positions.append(subject_index[code])
+        semester_subjects.append(positions)
+        marks.append(semester['marks'])
+        sgpa.append(semester['sgpa'])
+        totals.append(semester['total'])
+        created_at.append(epoch_seconds(semester['timestamp']))
+    return {
+        'v': COMPACT_VERSION,
+        'username': payload['username'],
+        'current_semester': payload['current_semester'],
+        'cgpa': payload['cgpa'],
+        'total_marks': payload['total_marks'],
+        'rank': payload['rank'],
+        'subjects': subjects,
+        'semester_subjects': semester_subjects,
+        'marks': marks,
+        'sgpa': sgpa,
+        'totals': totals,
+        'created_at': created_at,
+    }
+
+
+def wants_compact(request):
+    """True when the client asked for the compact format (?format=compact or an explicit Accept)"""
+    if request.args.get('format') == COMPACT_FORMAT_PARAM:
+        return True
+    return any(value == COMPACT_MEDIA_TYPE and quality > 0 for value, quality in request.accept_mimetypes)
+
+
+def accepts_gzip(request):
+    return request.accept_encodings['gzip'] > 0
+
+
+def compact_response(response_class, payload, use_gzip, min_gzip_bytes=GZIP_MIN_BYTES):
+    """Response with the compact dashboard body, gzip-encoded above min_gzip_bytes when accepted"""
+    body = dumps(compact_dashboard(payload))
+    compressed = use_gzip and len(body) >= min_gzip_bytes
+    if compressed:
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    response = response_class(body, mimetype=COMPACT_MEDIA_TYPE)
+    if compressed:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
@@ -1,12 +1,50 @@
 import os
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from flask_sqlalchemy.session import Session
 from dotenv import load_dotenv
+from werkzeug.middleware.proxy_fix import ProxyFix
+from sqlalchemy import event
 
 # Load environment variables from .env file
 load_dotenv()
 
+REPLICA_BIND = 'replica'
+
+def normalize_database_url(url):
+    """Accept the legacy postgres:// scheme that SQLAlchemy no longer recognises"""
+    if url and url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url or ''
+
+def engine_options(config, url):
+    """SQLAlchemy engine options for a database URL"""
+    if url.startswith('sqlite'):
+        # SQLite pragmas (WAL, busy timeout) are applied per connection in init_db
+        return {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+    
+    options = {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+    if url.startswith('postgresql') and config['DB_STATEMENT_TIMEOUT_MS']:
+        options['connect_args'] = {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"}
+    return options
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica while the current request is marked read-only"""
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('use_replica') and not self._flushing:
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
 def create_app():
     """Create and configure the Flask application"""
     app = Flask(__name__)
@@ -14,34 +52,161 @@ def create_app():
     # Database configuration
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your_secret_key_change_this_in_production')
     
-    # Use SQLite for demo/testing if PostgreSQL URL not available
-    database_url = os.getenv('DATABASE_URL')
-    if not database_url or 'postgresql' in database_url:
-        # Fallback to SQLite for demo
+    # Use SQLite for demo/testing if no database URL is configured
+    database_url = normalize_database_url(os.getenv('DATABASE_URL'))
+    if not database_url:
         database_url = 'sqlite:///report_card_demo.db'
-        print("Using SQLite database for demo (report_card_demo.db)")
+        app.logger.warning('DATABASE_URL is not set, using SQLite database for demo (report_card_demo.db)')
+    
+    # Connection pool (server databases), statement timeout and SQLite locking
+    app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 10))
+    app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    app.config['DB_POOL_TIMEOUT'] = int(os.getenv('DB_POOL_TIMEOUT', 30))
+    app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    app.config['DB_POOL_PRE_PING'] = os.getenv('DB_POOL_PRE_PING', 'True').lower() == 'true'
+    app.config['DB_STATEMENT_TIMEOUT_MS'] = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 5000))
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    
+    # Optional read replica for read-only routes, and how long a user's own writes pin them to the primary
+    app.config['DB_REPLICA_URL'] = normalize_database_url(os.getenv('DATABASE_REPLICA_URL'))
+    app.config['DB_REPLICA_MAX_LAG'] = int(os.getenv('DB_REPLICA_MAX_LAG', 5))
     
     app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config, database_url)
+    if app.config['DB_REPLICA_URL']:
+        replica_url = app.config['DB_REPLICA_URL']
+        app.config['SQLALCHEMY_BINDS'] = {
+            REPLICA_BIND: {'url': replica_url, **engine_options(app.config, replica_url)},
+        }
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
     app.config['SESSION_COOKIE_SECURE'] = False
     
+    # Dashboard payload cache
+    app.config['DASHBOARD_CACHE_TTL'] = int(os.getenv('DASHBOARD_CACHE_TTL', 300))
+    app.config['DASHBOARD_CACHE_SIZE'] = int(os.getenv('DASHBOARD_CACHE_SIZE', 4096))
+    app.config['DASHBOARD_CACHE_URL'] = os.getenv('DASHBOARD_CACHE_URL', '')
+    # Compact dashboard responses at least this large are gzip-encoded for clients that accept it
+    app.config['DASHBOARD_GZIP_MIN_BYTES'] = int(os.getenv('DASHBOARD_GZIP_MIN_BYTES', 1400))
+    
+    # Prometheus /metrics endpoint (multi-process aggregation when PROMETHEUS_MULTIPROC_DIR is set)
+    app.config['METRICS_ENABLED'] = os.getenv('ENABLE_METRICS', 'True').lower() == 'true'
+    
+    # On-demand profiling: sampled fraction of requests and/or HMAC-signed X-Profile-Token header
+    app.config['PROFILE_SAMPLE_RATE'] = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+    app.config['PROFILE_SECRET'] = os.getenv('PROFILE_SECRET', '')
+    app.config['PROFILE_SLOW_MS'] = int(os.getenv('PROFILE_SLOW_MS', 500))
+    app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR', 'profiles')
+    app.config['PROFILE_MAX_FILES'] = int(os.getenv('PROFILE_MAX_FILES', 200))
+    
+    # Bearer token for registrar/staff APIs such as /export (disabled when empty)
+    app.config['STAFF_API_TOKEN'] = os.getenv('STAFF_API_TOKEN', '')
+    
+    # Templates precompiled by `flask compile-templates` (used when the directory exists)
+    app.config['COMPILED_TEMPLATES_DIR'] = os.getenv('COMPILED_TEMPLATES_DIR',
+                                                     os.path.join(app.root_path, 'build', 'templates'))
+    # Fingerprinted, precompressed static files built by `flask build-assets` (served under /assets when present)
+    app.config['STATIC_BUILD_DIR'] = os.getenv('STATIC_BUILD_DIR', os.path.join(app.root_path, 'build', 'static'))
+    
+    # Password hashing: bcrypt cost calibrated per process to a target latency (or fixed with PASSWORD_HASH_ROUNDS),
+    # run on a bounded pool that sheds logins with a 503 once PASSWORD_HASH_MAX_PENDING hashes are waiting
+    app.config['PASSWORD_HASH_TARGET_MS'] = int(os.getenv('PASSWORD_HASH_TARGET_MS', 250))
+    app.config['PASSWORD_HASH_ROUNDS'] = int(os.getenv('PASSWORD_HASH_ROUNDS', 0))
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', 1))
+    app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 16))
+    app.config['PASSWORD_HASH_TIMEOUT'] = float(os.getenv('PASSWORD_HASH_TIMEOUT', 5))
+    
+    # Seconds between full rebuilds of each worker's SGPA rank index
+    app.config['RANK_INDEX_REFRESH'] = int(os.getenv('RANK_INDEX_REFRESH', 300))
+    
+    # Login rate limiter ('memory' per process, or sqlite:///path shared by all workers)
+    app.config['RATE_LIMIT_URL'] = os.getenv('RATE_LIMIT_URL', 'memory')
+    app.config['RATE_LIMIT_MAX_KEYS'] = int(os.getenv('RATE_LIMIT_MAX_KEYS', 100000))
+    # Failed logins allowed per client address per window (raise it when many users share one NAT)
+    app.config['MAX_LOGIN_ATTEMPTS_PER_IP'] = int(os.getenv('MAX_LOGIN_ATTEMPTS_PER_IP', 20))
+    # Reverse proxies in front of the app: the client address is taken from that many X-Forwarded-For hops
+    # (0 ignores the header, which clients can set to anything)
+    app.config['PROXY_FIX_X_FOR'] = int(os.getenv('PROXY_FIX_X_FOR', 0))
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+    
+    # Security event pipeline (stdout when neither a file nor the database is configured)
+    app.config['SECURITY_LOG_FILE'] = os.getenv('SECURITY_LOG_FILE', '')
+    app.config['SECURITY_LOG_MAX_BYTES'] = int(os.getenv('SECURITY_LOG_MAX_BYTES', 10 * 1024 * 1024))
+    app.config['SECURITY_LOG_BACKUPS'] = int(os.getenv('SECURITY_LOG_BACKUPS', 5))
+    app.config['SECURITY_LOG_DB'] = os.getenv('SECURITY_LOG_DB', 'False').lower() == 'true'
+    app.config['SECURITY_LOG_QUEUE_SIZE'] = int(os.getenv('SECURITY_LOG_QUEUE_SIZE', 10000))
+    app.config['SECURITY_LOG_POLICY'] = os.getenv('SECURITY_LOG_POLICY', 'drop_newest')
+    
     return app
 
 def init_db(app):
-    """Initialize database with the app"""
+    """Initialize database with the app (Flask-Migrate only under the flask CLI)"""
     from models import db
     
     db.init_app(app)
-    migrate = Migrate(app, db)
+    # Alembic is the slowest import of the app; web workers never run migrations
+    migrate = None
+    if os.environ.get('FLASK_RUN_FROM_CLI'):
+        from flask_migrate import Migrate
+        migrate = Migrate(app, db, directory=os.path.join(app.root_path, 'migrations'))
+    
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                configure_sqlite(engine, app.config['SQLITE_BUSY_TIMEOUT_MS'])
     
     return db, migrate
 
+def configure_sqlite(engine, busy_timeout_ms):
+    """Use WAL (readers don't block the writer) and wait on locks instead of failing"""
+    in_memory = engine.url.database in (None, '', ':memory:')
+    
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA busy_timeout = {int(busy_timeout_ms)}')
+        if not in_memory:
+            cursor.execute('PRAGMA journal_mode = WAL')
+            cursor.execute('PRAGMA synchronous = NORMAL')
+        cursor.close()
+
+def register_commands(app):
+    """Register the init-db and sync-replica CLI commands on the app"""
+    from models import db
+    
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create all tables on an empty database and stamp it with the latest migration."""
+        from flask_migrate import stamp
+        
+        if db.inspect(db.engine).get_table_names():
+            raise click.ClickException('Database already has tables; run `flask db upgrade` instead')
+        create_tables(app, db)
+        stamp()
+        click.echo('Created all tables and stamped the latest migration')
+    
+    @app.cli.command('sync-replica')
+    def sync_replica():
+        """Copy the SQLite primary onto the SQLite replica (local replica testing)."""
+        primary, replica = db.engines[None], db.engines.get(REPLICA_BIND)
+        if replica is None:
+            raise click.ClickException('DATABASE_REPLICA_URL is not configured')
+        if primary.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+            raise click.ClickException('sync-replica only copies SQLite databases; use streaming replication for PostgreSQL')
+        
+        source, target = primary.raw_connection(), replica.raw_connection()
+        try:
+            source.driver_connection.backup(target.driver_connection)
+        finally:
+            source.close()
+            target.close()
+        click.echo(f'Copied {primary.url.database} to {replica.url.database}')
+
 def create_tables(app, db):
-    """Create all database tables"""
+    """Create all database tables (explicit step: `flask init-db`, tests and benchmarks)"""
     with app.app_context():
         db.create_all()
-        print("Database tables created successfully!")
 
 def get_db_connection_info():
     """Get database connection information for debugging"""
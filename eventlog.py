@@ -0,0 +1,209 @@
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+
+DROP_NEWEST = 'drop_newest'
+DROP_OLDEST = 'drop_oldest'
+BLOCK = 'block'
+
+
+def _format(event):
+    """Turn a raw event tuple into the structured record written by sinks"""
+    created, event_type, username, ip, details = event
+    return {
+        'timestamp': datetime.fromtimestamp(created).strftime('%Y-%m-%d %H:%M:%S'),
+        'event': event_type,
+        'username': username,
+        'ip': ip,
+        'details': details,
+    }
+
+
+class StreamSink:
+    """Write records as JSON lines to a stream (stdout by default)"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def write(self, records):
+        self.stream.write(''.join(f'SECURITY LOG: {json.dumps(r)}\n' for r in records))
+        self.stream.flush()
+
+
+class RotatingJSONLinesSink:
+    """Append records to a JSON-lines file, rotating it at max_bytes"""
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, records):
+        with open(self.path, 'a', encoding='utf-8') as handle:
+            handle.write(''.join(json.dumps(r) + '\n' for r in records))
+            size = handle.tell()
+        if size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f'{self.path}.{index}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.path}.{index + 1}')
+        os.replace(self.path, f'{self.path}.1')
+
+
+class DatabaseSink:
+    """Insert records into the security_events table with one executemany per batch"""
+
+    def __init__(self, engine):
+        from models import SecurityEvent
+        self.engine = engine
+        self.table = SecurityEvent.__table__
+
+    def write(self, records):
+        rows = [
+            {
+                'created_at': datetime.fromisoformat(r['timestamp']),
+                'event': r['event'],
+                'username': r['username'],
+                'ip': r['ip'],
+                'details': r['details'],
+            }
+            for r in records
+        ]
+        with self.engine.begin() as conn:
+            conn.execute(insert(self.table), rows)
+
+
+class EventLogger:
+    """Bounded queue drained by a background thread that writes in batches
+
+    emit() only enqueues a tuple, so the request thread never waits on
+    stdout, files or the database. When the queue is full the configured
+    policy either drops the new event, drops the oldest queued one, or
+    blocks briefly; every discarded event is counted in `dropped`.
+    """
+
+    def __init__(self, sinks, max_queue=10000, batch_size=500, flush_interval=1.0,
+                 policy=DROP_NEWEST, block_timeout=0.05):
+        self.sinks = sinks
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+        # Guards the writer start and the counters, which request threads update concurrently
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        # Started lazily so each forked worker gets its own writer thread
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name='security-event-writer', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def emit(self, event_type, username=None, ip=None, details=None):
+        """Queue an event without blocking the caller"""
+        self._ensure_started()
+        event = (time.time(), event_type, username, ip, details)
+        try:
+            if self.policy == BLOCK:
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+        except queue.Full:
+            if self.policy == DROP_OLDEST:
+                try:
+                    self._queue.get_nowait()
+                    self._queue.put_nowait(event)
+                except (queue.Empty, queue.Full):
+                    pass
+            with self._lock:
+                self.dropped += 1
+
+    def _drain(self, first=None):
+        batch = [first] if first is not None else []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        if not batch:
+            return
+        records = [_format(event) for event in batch]
+        for sink in self.sinks:
+            try:
+                sink.write(records)
+            except Exception as error:
+                # Never let a failing sink kill the writer thread
+                sys.stderr.write(f'security event sink {type(sink).__name__} failed: {error}\n')
+        with self._lock:
+            self.written += len(records)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._write(self._drain(first))
+
+    def flush(self):
+        """Write everything currently queued from the calling thread"""
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self):
+        """Stop the writer thread and flush remaining events"""
+        self._stopped.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+
+def create_event_logger(app, engine):
+    """Build the event logger from app config and flush it at interpreter exit"""
+    sinks = []
+    if app.config['SECURITY_LOG_FILE']:
+        sinks.append(RotatingJSONLinesSink(
+            app.config['SECURITY_LOG_FILE'],
+            max_bytes=app.config['SECURITY_LOG_MAX_BYTES'],
+            backup_count=app.config['SECURITY_LOG_BACKUPS'],
+        ))
+    if app.config['SECURITY_LOG_DB']:
+        sinks.append(DatabaseSink(engine))
+    if not sinks:
+        sinks.append(StreamSink())
+
+    logger = EventLogger(
+        sinks,
+        max_queue=app.config['SECURITY_LOG_QUEUE_SIZE'],
+        policy=app.config['SECURITY_LOG_POLICY'],
+    )
+    atexit.register(logger.close)
+    return logger
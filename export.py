@@ -0,0 +1,205 @@
+import csv
+import io
+import json
+import sys
+import zlib
+from datetime import datetime
+
+import click
+from sqlalchemy import or_, select
+from sqlalchemy.orm import joinedload
+
+from models import db, User, Student, Semester, SemesterMark
+
+CSV_COLUMNS = ['username', 'semester_number', 'subjects', 'marks', 'sgpa', 'total', 'timestamp', 'updated_at']
+BATCH_SIZE = 1000
+FLUSH_BYTES = 64 * 1024
+PAGE_SIZE = 100
+
+
+def parse_timestamp(value):
+    """Parse an ISO-8601 filter value, None when empty"""
+    return datetime.fromisoformat(value) if value else None
+
+
+def iter_report_cards(semester_number=None, updated_since=None, updated_until=None, batch_size=BATCH_SIZE):
+    """Yield one record per semester, streaming rows from a server-side cursor
+
+    Marks are joined in and grouped on the fly (rows arrive ordered by
+    semester id and position), so memory stays constant for any export size.
+    """
+    query = (
+        select(User.username, Semester.id, Semester.semester_number, Semester.sgpa, Semester.total_marks,
+               Semester.created_at, Semester.updated_at, SemesterMark.subject_code, SemesterMark.mark)
+        .join(Student, Student.user_id == User.id)
+        .join(Semester, Semester.student_id == Student.id)
+        .join(SemesterMark, SemesterMark.semester_id == Semester.id)
+        .order_by(Semester.id, SemesterMark.position)
+    )
+    if semester_number is not None:
+        query = query.where(Semester.semester_number == semester_number)
+    if updated_since is not None:
+        query = query.where(Semester.updated_at >= updated_since)
+    if updated_until is not None:
+        query = query.where(Semester.updated_at < updated_until)
+
+    result = db.session.execute(query.execution_options(stream_results=True, yield_per=batch_size))
+    record = None
+    for username, semester_id, number, sgpa, total, created_at, updated_at, subject, mark in result:
+        if record is None or record['_id'] != semester_id:
+            if record is not None:
+                del record['_id']
+                yield record
+            record = {
+                '_id': semester_id,
+                'username': username,
+                'semester_number': number,
+                'subjects': [],
+                'marks': [],
+                'sgpa': sgpa,
+                'total': total,
+                'timestamp': created_at.isoformat(),
+                'updated_at': updated_at.isoformat() if updated_at else None,
+            }
+        record['subjects'].append(subject)
+        record['marks'].append(mark)
+    if record is not None:
+        del record['_id']
+        yield record
+
+
+def report_card_page(usernames=None, student_ids=None, current_semester=None, cursor=None, limit=PAGE_SIZE):
+    """One keyset page of report cards ordered by student id, in two statements
+
+    The first statement picks the page's students (id > cursor); the second
+    loads all of their semesters and marks with one IN list. Returns the
+    cards and the cursor for the next page (None on the last page).
+    """
+    query = (
+        select(Student.id, User.username, Student.current_semester, Student.cgpa, Student.total_marks)
+        .join(User, User.id == Student.user_id)
+        .order_by(Student.id)
+        .limit(limit + 1)
+    )
+    # Students named by either list are returned (a union, not the intersection)
+    selectors = []
+    if usernames:
+        selectors.append(User.username.in_(usernames))
+    if student_ids:
+        selectors.append(Student.id.in_(student_ids))
+    if selectors:
+        query = query.where(or_(*selectors))
+    if current_semester is not None:
+        query = query.where(Student.current_semester == current_semester)
+    if cursor is not None:
+        query = query.where(Student.id > cursor)
+    students = db.session.execute(query).all()
+    has_more = len(students) > limit
+    students = students[:limit]
+
+    cards = {
+        student_id: {
+            'student_id': student_id,
+            'username': username,
+            'current_semester': current,
+            'cgpa': round(cgpa, 2) if cgpa is not None else None,
+            'total_marks': total,
+            'semesters': [],
+        }
+        for student_id, username, current, cgpa, total in students
+    }
+    if cards:
+        semesters = db.session.execute(
+            select(Semester).options(joinedload(Semester.mark_rows))
+            .where(Semester.student_id.in_(list(cards)))
+            .order_by(Semester.student_id, Semester.created_at, Semester.id)
+        ).unique().scalars()
+        for semester in semesters:
+            cards[semester.student_id]['semesters'].append(semester.to_dict())
+
+    next_cursor = students[-1][0] if has_more else None
+    return list(cards.values()), next_cursor
+
+
+def _buffered(lines):
+    """Group small lines into chunks of roughly FLUSH_BYTES"""
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iter_ndjson(records):
+    return _buffered(json.dumps(record) + '\n' for record in records)
+
+
+def iter_csv(records):
+    def lines():
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(CSV_COLUMNS)
+        for record in records:
+            writer.writerow([
+                record['username'], record['semester_number'], ';'.join(record['subjects']),
+                ';'.join(str(mark) for mark in record['marks']), record['sgpa'], record['total'],
+                record['timestamp'], record['updated_at'],
+            ])
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+    return _buffered(lines())
+
+
+def iter_gzip(chunks):
+    """Compress a stream of text chunks into gzip bytes incrementally"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+FORMATS = {
+    'csv': (iter_csv, 'text/csv'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+}
+
+
+def register_commands(app):
+    """Register the export-report-cards CLI command on the app"""
+
+    @app.cli.command('export-report-cards')
+    @click.option('--format', 'fmt', type=click.Choice(sorted(FORMATS)), default='csv', show_default=True)
+    @click.option('--semester', type=click.IntRange(1, 8), help='Only this semester number.')
+    @click.option('--updated-since', help='Only semesters updated at or after this ISO timestamp.')
+    @click.option('--updated-until', help='Only semesters updated before this ISO timestamp.')
+    @click.option('--output', type=click.Path(dir_okay=False), help='Output file (default: stdout).')
+    @click.option('--gzip', 'compress', is_flag=True, help='Gzip the output.')
+    def export_report_cards(fmt, semester, updated_since, updated_until, output, compress):
+        """Stream every report card as CSV or NDJSON."""
+        try:
+            since, until = parse_timestamp(updated_since), parse_timestamp(updated_until)
+        except ValueError as error:
+            raise click.BadParameter(str(error))
+
+        serializer, _ = FORMATS[fmt]
+        chunks = serializer(iter_report_cards(semester, since, until))
+        if compress:
+            chunks = iter_gzip(chunks)
+
+        if output:
+            stream = open(output, 'wb') if compress else open(output, 'w', encoding='utf-8', newline='')
+        else:
+            stream = sys.stdout.buffer if compress else sys.stdout
+        try:
+            for chunk in chunks:
+                stream.write(chunk)
+        finally:
+            if output:
+                stream.close()
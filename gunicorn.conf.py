@@ -0,0 +1,38 @@
+import os
+import shutil
+import tempfile
+
+# Every worker writes its metrics to files here; /metrics on any worker aggregates them.
+# Must be set before the app (and prometheus_client) is imported by the workers.
+multiproc_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'report-card-metrics')
+)
+# The preloaded app creates its metric files while the config is still being applied
+os.makedirs(multiproc_dir, exist_ok=True)
+
+# Import the app once in the master and fork workers from it: startup cost is paid once and the
+# imported code stays shared copy-on-write. Importing the app opens no connections or threads.
+preload_app = True
+
+# Threaded workers: a login waiting on the bcrypt pool (which releases the GIL) doesn't hold up
+# dashboard requests routed to the same worker
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+
+def on_starting(server):
+    """Start each master with an empty metrics directory"""
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def post_worker_init(worker):
+    """Per-worker startup that needs the database (fresh connection pool, rank index)"""
+    warm_up = worker.wsgi.extensions.get('warm_up')
+    if warm_up is not None:
+        warm_up()
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited"""
+    from prometheus_flask_exporter.multiprocess import GunicornInternalPrometheusMetrics
+    GunicornInternalPrometheusMetrics.mark_process_dead_on_child_exit(worker.pid)
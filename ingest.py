@@ -0,0 +1,331 @@
+import csv
+import io
+import json
+import re
+import time
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import bindparam, select, update
+
+from analytics import apply_deltas, new_deltas, add_sgpa_delta, add_mark_delta, dialect_insert
+from models import db, User, Student, Semester, SemesterMark
+from rollups import refresh_student_rollups
+
+COLUMNS = ['username', 'semester_number', 'subject', 'mark']
+BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+MAX_USERNAME_LENGTH = 80
+# ASCII digits only: str.isdigit() also accepts other scripts' digits and superscripts
+ASCII_INT = re.compile(r'[0-9]{1,9}')
+# Gap per semester number when a back-filled semester predates every existing one
+BACKFILL_STEP = timedelta(seconds=1)
+
+
+class IngestError(ValueError):
+    """The upload as a whole cannot be read (bad format or missing columns)"""
+
+
+def iter_csv_rows(stream):
+    """Yield (line number, row dict) from a CSV text stream with a header row"""
+    reader = csv.DictReader(stream)
+    missing = [column for column in COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise IngestError(f"Missing CSV columns: {', '.join(missing)}")
+    for row in reader:
+        yield reader.line_num, row
+
+
+def iter_ndjson_rows(stream):
+    """Yield (line number, row dict) from an NDJSON text stream, None for unparseable lines"""
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+FORMATS = {
+    'csv': iter_csv_rows,
+    'ndjson': iter_ndjson_rows,
+}
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _scalar(value):
+    """A field as text; '' (which every check rejects) when absent or a JSON list/object"""
+    if isinstance(value, (str, int, float)):
+        return value
+    return ''
+
+
+def _column(batch, name):
+    """One field of every row as a stripped string array ('' when absent or not a scalar)"""
+    import numpy as np
+    values = [_scalar(row.get(name)) if row is not None else '' for _, row in batch]
+    return np.char.strip(np.array(values, dtype=str))
+
+
+def _parse_ints(values):
+    """Parse a string array to int64, returning the values and a mask of valid entries"""
+    import numpy as np
+    valid = np.fromiter((ASCII_INT.fullmatch(value) is not None for value in values.tolist()),
+                        dtype=bool, count=values.size)
+    # Only 1-9 ASCII digits remain, so the conversion cannot fail or overflow
+    parsed = np.where(valid, values, '0').astype(np.int64)
+    return parsed, valid
+
+
+def validate_batch(batch, subjects, max_semesters):
+    """Check a batch of raw rows with array operations
+
+    Returns the valid rows as (line, username, semester_number, subject, mark)
+    tuples and the invalid ones as (line, error) pairs, reporting the first
+    failing check for each row.
+    """
+    # Imported on first upload so web workers that never ingest don't load NumPy at startup
+    import numpy as np
+    lines = np.array([line for line, _ in batch])
+    parsed = np.array([row is not None for _, row in batch])
+    usernames = _column(batch, 'username')
+    subject_codes = _column(batch, 'subject')
+    numbers, number_is_int = _parse_ints(_column(batch, 'semester_number'))
+    marks, mark_is_int = _parse_ints(_column(batch, 'mark'))
+
+    username_length = np.char.str_len(usernames)
+    checks = [
+        (parsed, 'Row is not a JSON object'),
+        ((username_length > 0) & (username_length <= MAX_USERNAME_LENGTH), 'Missing or invalid username'),
+        (number_is_int, 'semester_number must be an integer'),
+        ((numbers >= 1) & (numbers <= max_semesters), f'semester_number must be between 1 and {max_semesters}'),
+        (np.isin(subject_codes, subjects), 'Unknown subject code'),
+        (mark_is_int, 'mark must be an integer'),
+        ((marks >= 0) & (marks <= 100), 'mark must be between 0 and 100'),
+    ]
+
+    errors = []
+    failed = np.zeros(len(batch), dtype=bool)
+    for passed, message in checks:
+        newly_failed = ~passed & ~failed
+        errors.extend((int(line), message) for line in lines[newly_failed])
+        failed |= newly_failed
+
+    ok = np.flatnonzero(~failed)
+    valid = list(zip(lines[ok].tolist(), usernames[ok].tolist(), numbers[ok].tolist(),
+                     subject_codes[ok].tolist(), marks[ok].tolist()))
+    return valid, errors
+
+
+def _upsert_marks(rows):
+    stmt = dialect_insert(db.engine.dialect.name)(SemesterMark.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['semester_id', 'position'],
+        set_={'subject_code': stmt.excluded.subject_code, 'mark': stmt.excluded.mark},
+    )
+    db.session.execute(stmt, rows)
+
+
+def _backfill_created_at(number, placed, now):
+    """created_at for a new semester that keeps a student's semesters in semester-number order
+
+    The dashboard orders semesters by created_at, so a semester uploaded
+    after later ones exist is slotted between its stored neighbours
+    (`placed` is their (semester_number, created_at)) instead of being
+    stamped `now` and shown as the latest.
+    """
+    later = [(created_at, other) for other, created_at in placed if other > number]
+    if not later:
+        return now
+    next_at, next_number = min(later)
+    earlier = [(created_at, other) for other, created_at in placed if other < number and created_at < next_at]
+    if not earlier:
+        return next_at - BACKFILL_STEP * (next_number - number)
+    prev_at, prev_number = max(earlier)
+    return prev_at + (next_at - prev_at) * (number - prev_number) / (next_number - prev_number)
+
+
+def write_batch(rows):
+    """Upsert one batch of validated rows in a single transaction
+
+    Marks are merged per (student, semester, subject) into what is already
+    stored, so a semester split across batches or uploads ends up complete;
+    totals and SGPA are recomputed from the merged marks. Cohort aggregates
+    are updated from the known old values in the same transaction because
+    these Core statements bypass the ORM flush listeners, and so are the
+    touched students' rollups.
+    """
+    semesters = Semester.__table__
+    marks = SemesterMark.__table__
+    stats = {'semesters_created': 0, 'semesters_updated': 0, 'marks_written': 0}
+
+    names = {username for _, username, _, _, _ in rows}
+    student_ids = dict(db.session.execute(
+        select(User.username, Student.id).join(Student, Student.user_id == User.id).where(User.username.in_(names))
+    ).all())
+
+    errors = []
+    uploaded = {}
+    for line, username, number, subject, mark in rows:
+        student_id = student_ids.get(username)
+        if student_id is None:
+            errors.append((line, 'Unknown student'))
+            continue
+        uploaded.setdefault((student_id, number), {})[subject] = mark
+    if not uploaded:
+        return set(), errors, stats
+
+    touched_students = {student_id for student_id, _ in uploaded}
+    existing = {}
+    placed = {}
+    for semester_id, student_id, number, sgpa, created_at in db.session.execute(
+            select(semesters.c.id, semesters.c.student_id, semesters.c.semester_number, semesters.c.sgpa,
+                   semesters.c.created_at)
+            .where(semesters.c.student_id.in_(touched_students)).order_by(semesters.c.id)).all():
+        if created_at is not None:
+            placed.setdefault(student_id, []).append((number, created_at))
+        if (student_id, number) in uploaded:
+            existing[(student_id, number)] = (semester_id, sgpa)
+
+    stored = {}
+    if existing:
+        for semester_id, position, subject, mark in db.session.execute(
+                select(marks.c.semester_id, marks.c.position, marks.c.subject_code, marks.c.mark)
+                .where(marks.c.semester_id.in_([semester_id for semester_id, _ in existing.values()]))).all():
+            stored.setdefault(semester_id, {})[subject] = [position, mark]
+
+    now = datetime.utcnow()
+    deltas = new_deltas()
+    created, updates, mark_rows = [], [], []
+    changed_students = set()
+    for key, subject_marks in uploaded.items():
+        semester_id, old_sgpa = existing.get(key, (None, None))
+        merged = stored.get(semester_id, {})
+        next_position = max((position for position, _ in merged.values()), default=-1) + 1
+        changed = []
+        for subject, mark in subject_marks.items():
+            entry = merged.get(subject)
+            if entry is None:
+                entry = merged[subject] = [next_position, None]
+                next_position += 1
+            if entry[1] != mark:
+                if entry[1] is not None:
+                    add_mark_delta(deltas, subject, entry[1], -1)
+                add_mark_delta(deltas, subject, mark, 1)
+                entry[1] = mark
+                changed.append((entry[0], subject, mark))
+        if not changed:
+            continue
+        changed_students.add(key[0])
+
+        total, sgpa = Semester.compute_scores([mark for _, mark in sorted(merged.values())])
+        add_sgpa_delta(deltas, key[1], sgpa, 1)
+        if semester_id is None:
+            created.append((key, total, sgpa, changed))
+        else:
+            add_sgpa_delta(deltas, key[1], old_sgpa, -1)
+            updates.append({'b_id': semester_id, 'total_marks': total, 'sgpa': sgpa, 'updated_at': now})
+            mark_rows.extend({'semester_id': semester_id, 'position': position, 'subject_code': subject, 'mark': mark}
+                             for position, subject, mark in changed)
+
+    if created:
+        # Ids (the created_at tie-break) follow semester numbers too
+        created.sort(key=lambda entry: entry[0])
+        db.session.execute(semesters.insert(), [
+            {'student_id': student_id, 'semester_number': number, 'sgpa': sgpa, 'total_marks': total,
+             'created_at': _backfill_created_at(number, placed.get(student_id, ()), now), 'updated_at': now}
+            for (student_id, number), total, sgpa, _ in created
+        ])
+        # Read the new ids back rather than relying on RETURNING support for executemany
+        new_ids = {}
+        for semester_id, student_id, number in db.session.execute(
+                select(semesters.c.id, semesters.c.student_id, semesters.c.semester_number)
+                .where(semesters.c.student_id.in_({key[0] for key, _, _, _ in created}))
+                .order_by(semesters.c.id)).all():
+            new_ids[(student_id, number)] = semester_id
+        for key, _, _, changed in created:
+            mark_rows.extend({'semester_id': new_ids[key], 'position': position, 'subject_code': subject, 'mark': mark}
+                             for position, subject, mark in changed)
+    if updates:
+        db.session.execute(update(semesters).where(semesters.c.id == bindparam('b_id')), updates)
+    if mark_rows:
+        _upsert_marks(mark_rows)
+    refresh_student_rollups(db.session.connection(), changed_students)
+    apply_deltas(db.session.connection(), deltas)
+    db.session.commit()
+
+    stats['semesters_created'] = len(created)
+    stats['semesters_updated'] = len(updates)
+    stats['marks_written'] = len(mark_rows)
+    return touched_students, errors, stats
+
+
+def ingest_marks(stream, fmt, subjects, max_semesters, batch_size=BATCH_SIZE, on_commit=None):
+    """Validate and upsert a marks upload batch by batch, returning a per-row report
+
+    `on_commit` is called with the student ids written by each committed
+    batch.
+    """
+    if fmt not in FORMATS:
+        raise IngestError(f"Unknown format '{fmt}'")
+
+    report = {'rows': 0, 'accepted': 0, 'rejected': 0, 'semesters_created': 0,
+              'semesters_updated': 0, 'marks_written': 0, 'errors': []}
+    for batch in _batches(FORMATS[fmt](stream), batch_size):
+        valid, errors = validate_batch(batch, subjects, max_semesters)
+        students, write_errors, stats = write_batch(valid) if valid else (set(), [], {})
+        errors.extend(write_errors)
+        if students and on_commit is not None:
+            on_commit(students)
+
+        report['rows'] += len(batch)
+        report['rejected'] += len(errors)
+        report['accepted'] += len(batch) - len(errors)
+        for key, value in stats.items():
+            report[key] += value
+        room = MAX_REPORTED_ERRORS - len(report['errors'])
+        report['errors'].extend({'line': line, 'error': error} for line, error in sorted(errors)[:room])
+
+    report['errors_truncated'] = report['rejected'] > len(report['errors'])
+    return report
+
+
+def register_commands(app, subjects, max_semesters, on_commit=None):
+    """Register the ingest-marks CLI command on the app"""
+
+    @app.cli.command('ingest-marks')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(sorted(FORMATS)), help='Input format (default: from extension).')
+    @click.option('--batch-size', default=BATCH_SIZE, show_default=True, help='Rows validated and written per transaction.')
+    @click.option('--report', type=click.Path(dir_okay=False), help='Write the full JSON report to this file.')
+    def ingest_marks_command(path, fmt, batch_size, report):
+        """Upsert (username, semester_number, subject, mark) rows from a CSV or NDJSON file."""
+        fmt = fmt or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        started = time.perf_counter()
+        with io.open(path, encoding='utf-8', newline='') as stream:
+            try:
+                result = ingest_marks(stream, fmt, subjects, max_semesters, batch_size, on_commit)
+            except IngestError as error:
+                raise click.ClickException(str(error))
+        elapsed = time.perf_counter() - started
+
+        if report:
+            with open(report, 'w', encoding='utf-8') as handle:
+                json.dump(result, handle, indent=2)
+        for entry in result['errors'][:20]:
+            click.echo(f"line {entry['line']}: {entry['error']}", err=True)
+        click.echo(f"{result['rows']} rows ({result['accepted']} accepted, {result['rejected']} rejected), "
+                   f"{result['semesters_created']} semesters created, {result['semesters_updated']} updated "
+                   f"in {elapsed:.1f}s: {result['rows'] / max(elapsed, 1e-9):,.0f} rows/sec")
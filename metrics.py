@@ -0,0 +1,97 @@
+import os
+import time
+
+from flask import g, request
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
+
+# Set (by gunicorn.conf.py) before this module is imported; switches prometheus_client to per-process files
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+SQL_STATEMENTS = Histogram(
+    'report_card_sql_statements_per_request', 'SQL statements issued per request', ['endpoint'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34),
+)
+SQL_SECONDS = Histogram(
+    'report_card_sql_seconds_per_request', 'Time spent executing SQL per request', ['endpoint'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    'report_card_password_hash_seconds', 'Time spent hashing or verifying a password', ['operation'],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+PASSWORD_HASH_PENDING = Gauge(
+    'report_card_password_hash_pending', 'Password hashes queued or running in the hashing pool',
+    multiprocess_mode='livesum',
+)
+PASSWORD_HASH_REJECTED = Counter(
+    'report_card_password_hash_rejected_total', 'Logins shed with a 503 because the hashing pool was saturated',
+    ['reason'],
+)
+LOGIN_FAILURES = Counter('report_card_login_failures_total', 'Failed login attempts recorded by the rate limiter')
+LOGIN_LOCKOUTS = Counter('report_card_login_lockouts_total', 'Logins rejected because of too many failed attempts')
+RATE_LIMITER_KEYS = Gauge(
+    'report_card_rate_limiter_keys', 'Keys held by the login rate limiter', multiprocess_mode='liveall',
+)
+BACKFILL_SEMESTERS = Histogram(
+    'report_card_login_backfill_semesters', 'Semester rows created by a single login',
+    buckets=(1, 2, 3, 4, 5, 6, 7, 8),
+)
+DASHBOARD_CACHE = Counter('report_card_dashboard_cache_total', 'Dashboard payload cache lookups', ['result'])
+
+RATE_LIMITER_SIZE_INTERVAL = 1.0
+_rate_limiter_checked_at = 0.0
+
+
+def update_rate_limiter_size(rate_limiter):
+    """Refresh the rate-limiter size gauge, at most once per RATE_LIMITER_SIZE_INTERVAL"""
+    global _rate_limiter_checked_at
+    now = time.monotonic()
+    if now - _rate_limiter_checked_at >= RATE_LIMITER_SIZE_INTERVAL:
+        _rate_limiter_checked_at = now
+        RATE_LIMITER_KEYS.set(rate_limiter.size())
+
+
+def init_metrics(app, db):
+    """Expose /metrics with per-route latency and status counts plus per-request SQL histograms
+
+    Under gunicorn each worker writes to PROMETHEUS_MULTIPROC_DIR and any
+    worker serving /metrics aggregates all of them.
+    """
+    if not app.config['METRICS_ENABLED']:
+        return None
+
+    if MULTIPROCESS:
+        from prometheus_flask_exporter.multiprocess import GunicornInternalPrometheusMetrics
+        exporter = GunicornInternalPrometheusMetrics(app, group_by='endpoint')
+    else:
+        from prometheus_flask_exporter import PrometheusMetrics
+        exporter = PrometheusMetrics(app, group_by='endpoint')
+
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+        try:
+            g.sql_seconds = g.get('sql_seconds', 0.0) + elapsed
+        except RuntimeError:
+            # Statement issued outside of an app context (CLI, startup)
+            pass
+
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', start_timer)
+        event.listen(engine, 'after_cursor_execute', stop_timer)
+
+    @app.after_request
+    def observe_sql(response):
+        if request.endpoint not in (None, 'static', 'prometheus_metrics'):
+            # Statement counts come from the query counter (querycount.init_query_counter)
+            SQL_STATEMENTS.labels(request.endpoint).observe(g.get('sql_statements', 0))
+            SQL_SECONDS.labels(request.endpoint).observe(g.get('sql_seconds', 0.0))
+        return response
+
+    return exporter
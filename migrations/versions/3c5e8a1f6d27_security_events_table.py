@@ -0,0 +1,43 @@
+"""add security_events table
+
+Revision ID: 3c5e8a1f6d27
+Revises: 7a1f3c9d2b40
+Create Date: 2026-10-18 14:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c5e8a1f6d27'
+down_revision = '7a1f3c9d2b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('security_events'):
+        return
+    op.create_table('security_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('event', sa.String(length=40), nullable=False),
+    sa.Column('username', sa.String(length=80), nullable=True),
+    sa.Column('ip', sa.String(length=64), nullable=True),
+    sa.Column('details', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('security_events', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_security_events_created_at'), ['created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_security_events_event'), ['event'], unique=False)
+        batch_op.create_index(batch_op.f('ix_security_events_username'), ['username'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('security_events', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_security_events_username'))
+        batch_op.drop_index(batch_op.f('ix_security_events_event'))
+        batch_op.drop_index(batch_op.f('ix_security_events_created_at'))
+
+    op.drop_table('security_events')
@@ -0,0 +1,91 @@
+"""move semester marks into semester_marks table
+
+Revision ID: 7a1f3c9d2b40
+Revises: e2c6376b8db4
+Create Date: 2026-10-18 13:20:00.000000
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a1f3c9d2b40'
+down_revision = 'e2c6376b8db4'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+def upgrade():
+    conn = op.get_bind()
+
+    # Databases bootstrapped with db.create_all() may already have the table
+    if not sa.inspect(conn).has_table('semester_marks'):
+        op.create_table('semester_marks',
+        sa.Column('semester_id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.SmallInteger(), nullable=False),
+        sa.Column('subject_code', sa.String(length=16), nullable=False),
+        sa.Column('mark', sa.SmallInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['semester_id'], ['semesters.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('semester_id', 'position')
+        )
+        with op.batch_alter_table('semester_marks', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_semester_marks_subject_code'), ['subject_code'], unique=False)
+
+    # Copy existing JSON marks into the new table in batches
+    semester_marks = sa.table('semester_marks',
+        sa.column('semester_id', sa.Integer()),
+        sa.column('position', sa.SmallInteger()),
+        sa.column('subject_code', sa.String()),
+        sa.column('mark', sa.SmallInteger()),
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text('SELECT id, subjects, marks FROM semesters WHERE id > :last_id ORDER BY id LIMIT :limit'),
+            {'last_id': last_id, 'limit': BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+        values = []
+        for semester_id, subjects, marks in rows:
+            for position, (subject, mark) in enumerate(zip(json.loads(subjects), json.loads(marks))):
+                values.append({'semester_id': semester_id, 'position': position,
+                               'subject_code': subject, 'mark': mark})
+        if values:
+            conn.execute(semester_marks.insert(), values)
+        last_id = rows[-1][0]
+
+    with op.batch_alter_table('semesters', schema=None) as batch_op:
+        batch_op.drop_column('marks')
+        batch_op.drop_column('subjects')
+
+
+def downgrade():
+    with op.batch_alter_table('semesters', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('subjects', sa.Text(), nullable=False, server_default='[]'))
+        batch_op.add_column(sa.Column('marks', sa.Text(), nullable=False, server_default='[]'))
+
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        'SELECT semester_id, subject_code, mark FROM semester_marks ORDER BY semester_id, position'
+    ))
+    packed = {}
+    for semester_id, subject, mark in rows:
+        subjects, marks = packed.setdefault(semester_id, ([], []))
+        subjects.append(subject)
+        marks.append(mark)
+    for semester_id, (subjects, marks) in packed.items():
+        conn.execute(
+            sa.text('UPDATE semesters SET subjects = :subjects, marks = :marks WHERE id = :id'),
+            {'subjects': json.dumps(subjects), 'marks': json.dumps(marks), 'id': semester_id},
+        )
+
+    with op.batch_alter_table('semester_marks', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_semester_marks_subject_code'))
+
+    op.drop_table('semester_marks')
@@ -0,0 +1,42 @@
+"""add cohort aggregate tables
+
+Revision ID: 9d4b2e7c1a58
+Revises: 3c5e8a1f6d27
+Create Date: 2026-10-18 14:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4b2e7c1a58'
+down_revision = '3c5e8a1f6d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('cohort_sgpa_buckets'):
+        op.create_table('cohort_sgpa_buckets',
+        sa.Column('semester_number', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.SmallInteger(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('sgpa_sum', sa.Float(), nullable=False),
+        sa.Column('sgpa_sq_sum', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('semester_number', 'bucket')
+        )
+    if not inspector.has_table('cohort_subject_marks'):
+        op.create_table('cohort_subject_marks',
+        sa.Column('subject_code', sa.String(length=16), nullable=False),
+        sa.Column('mark', sa.SmallInteger(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('subject_code', 'mark')
+        )
+    # Populate the new tables from existing semesters with `flask rebuild-analytics`
+
+
+def downgrade():
+    op.drop_table('cohort_subject_marks')
+    op.drop_table('cohort_sgpa_buckets')
@@ -0,0 +1,28 @@
+"""index semesters by semester_number and sgpa for leaderboards
+
+Revision ID: b6e1f4a3c902
+Revises: 9d4b2e7c1a58
+Create Date: 2026-10-18 15:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e1f4a3c902'
+down_revision = '9d4b2e7c1a58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    indexes = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('semesters')}
+    if 'ix_semesters_semester_number_sgpa' not in indexes:
+        with op.batch_alter_table('semesters', schema=None) as batch_op:
+            batch_op.create_index('ix_semesters_semester_number_sgpa', ['semester_number', 'sgpa'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('semesters', schema=None) as batch_op:
+        batch_op.drop_index('ix_semesters_semester_number_sgpa')
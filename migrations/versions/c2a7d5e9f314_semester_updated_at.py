@@ -0,0 +1,33 @@
+"""add semesters.updated_at for incremental exports
+
+Revision ID: c2a7d5e9f314
+Revises: b6e1f4a3c902
+Create Date: 2026-10-18 15:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2a7d5e9f314'
+down_revision = 'b6e1f4a3c902'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('semesters')}
+    if 'updated_at' in columns:
+        return
+    with op.batch_alter_table('semesters', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_semesters_updated_at'), ['updated_at'], unique=False)
+
+    op.execute('UPDATE semesters SET updated_at = created_at')
+
+
+def downgrade():
+    with op.batch_alter_table('semesters', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_semesters_updated_at'))
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,28 @@
+"""index semesters by student_id and updated_at for dashboard validators
+
+Revision ID: d8f3b1c6a245
+Revises: c2a7d5e9f314
+Create Date: 2026-10-18 16:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f3b1c6a245'
+down_revision = 'c2a7d5e9f314'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    indexes = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('semesters')}
+    if 'ix_semesters_student_id_updated_at' not in indexes:
+        with op.batch_alter_table('semesters', schema=None) as batch_op:
+            batch_op.create_index('ix_semesters_student_id_updated_at', ['student_id', 'updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('semesters', schema=None) as batch_op:
+        batch_op.drop_index('ix_semesters_student_id_updated_at')
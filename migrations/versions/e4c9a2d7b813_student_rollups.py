@@ -0,0 +1,93 @@
+"""add academic rollup columns to students
+
+Revision ID: e4c9a2d7b813
+Revises: d8f3b1c6a245
+Create Date: 2026-10-18 18:20:00.000000
+
+"""
+import struct
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4c9a2d7b813'
+down_revision = 'd8f3b1c6a245'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+def _rollup(student_id, history):
+    """Update parameters for one student's rollup from its (sgpa, total, created_at) semesters in order"""
+    sgpas = [sgpa for sgpa, _, _ in history]
+    return {
+        'b_id': student_id,
+        'semester_count': len(history),
+        'total_marks': sum(total for _, total, _ in history),
+        'latest_sgpa': sgpas[-1],
+        'cgpa': sum(sgpas) / len(sgpas),
+        'latest_semester_at': history[-1][2],
+        'sgpa_history': struct.pack(f'<{len(sgpas)}H', *(int(round(sgpa * 100)) for sgpa in sgpas)),
+    }
+
+
+def _backfill():
+    """Compute every student's rollup from its semesters (same rules as rollups.compute_rollup)
+
+    Semesters are streamed ordered by student and updates are written
+    every BATCH_SIZE students, so memory stays constant for any cohort size.
+    """
+    bind = op.get_bind()
+    students = sa.table('students', sa.column('id'), sa.column('semester_count'), sa.column('total_marks'),
+                        sa.column('latest_sgpa'), sa.column('cgpa'), sa.column('latest_semester_at'),
+                        sa.column('sgpa_history'))
+    semesters = sa.table('semesters', sa.column('id'), sa.column('student_id'), sa.column('sgpa'),
+                         sa.column('total_marks'), sa.column('created_at'))
+    rows = bind.execute(
+        sa.select(semesters.c.student_id, semesters.c.sgpa, semesters.c.total_marks, semesters.c.created_at)
+        .order_by(semesters.c.student_id, semesters.c.created_at, semesters.c.id)
+        .execution_options(stream_results=True, yield_per=BATCH_SIZE)
+    )
+    statement = students.update().where(students.c.id == sa.bindparam('b_id'))
+    current_id, history, updates = None, [], []
+    for student_id, sgpa, total, created_at in rows:
+        if student_id != current_id:
+            if current_id is not None:
+                updates.append(_rollup(current_id, history))
+                if len(updates) >= BATCH_SIZE:
+                    bind.execute(statement, updates)
+                    updates = []
+            current_id, history = student_id, []
+        history.append((sgpa, total, created_at))
+    if current_id is not None:
+        updates.append(_rollup(current_id, history))
+    if updates:
+        bind.execute(statement, updates)
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('students')}
+    if 'cgpa' not in columns:
+        with op.batch_alter_table('students', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('semester_count', sa.Integer(), nullable=False, server_default='0'))
+            batch_op.add_column(sa.Column('total_marks', sa.Integer(), nullable=False, server_default='0'))
+            batch_op.add_column(sa.Column('latest_sgpa', sa.Float(), nullable=True))
+            batch_op.add_column(sa.Column('cgpa', sa.Float(), nullable=True))
+            batch_op.add_column(sa.Column('latest_semester_at', sa.DateTime(), nullable=True))
+            batch_op.add_column(sa.Column('sgpa_history', sa.LargeBinary(), nullable=False, server_default=''))
+            batch_op.create_index(batch_op.f('ix_students_cgpa'), ['cgpa'], unique=False)
+    _backfill()
+
+
+def downgrade():
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_students_cgpa'))
+        batch_op.drop_column('sgpa_history')
+        batch_op.drop_column('latest_semester_at')
+        batch_op.drop_column('cgpa')
+        batch_op.drop_column('latest_sgpa')
+        batch_op.drop_column('total_marks')
+        batch_op.drop_column('semester_count')
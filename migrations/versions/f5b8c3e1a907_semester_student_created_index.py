@@ -0,0 +1,28 @@
+"""index semesters by student_id and created_at for per-student loads
+
+Revision ID: f5b8c3e1a907
+Revises: e4c9a2d7b813
+Create Date: 2026-10-18 20:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5b8c3e1a907'
+down_revision = 'e4c9a2d7b813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    indexes = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('semesters')}
+    if 'ix_semesters_student_id_created_at' not in indexes:
+        with op.batch_alter_table('semesters', schema=None) as batch_op:
+            batch_op.create_index('ix_semesters_student_id_created_at', ['student_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('semesters', schema=None) as batch_op:
+        batch_op.drop_index('ix_semesters_student_id_created_at')
@@ -1,9 +1,13 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import desc, asc
+from database import RoutingSession
+from profiling import profile_span
+from sqlalchemy import desc, asc, func
+from sqlalchemy.orm import joinedload
 from datetime import datetime
-import json
+import struct
 
-db = SQLAlchemy()
+# Reads from request handlers marked read-only are routed to the replica bind when configured
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     """User model for authentication"""
@@ -17,6 +21,18 @@ class User(db.Model):
     # Relationship with student data
     student = db.relationship('Student', backref='user', uselist=False, cascade='all, delete-orphan')
     
+    @classmethod
+    def load_with_semesters(cls, username):
+        """Load a user, its student, ordered semesters and their marks in a single statement"""
+        return cls.query.options(
+            joinedload(cls.student).joinedload(Student.semesters).joinedload(Semester.mark_rows)
+        ).filter_by(username=username).first()
+    
+    @classmethod
+    def load_with_student(cls, username):
+        """Load a user together with its student record"""
+        return cls.query.options(joinedload(cls.student)).filter_by(username=username).first()
+    
     def __repr__(self):
         return f'<User {self.username}>'
 
@@ -30,8 +46,17 @@ class Student(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Relationship with semesters
-    semesters = db.relationship('Semester', backref='student', lazy='dynamic', cascade='all, delete-orphan')
+    # Academic rollups over all semesters (in dashboard order), maintained by rollups.py
+    semester_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_marks = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    latest_sgpa = db.Column(db.Float)
+    cgpa = db.Column(db.Float, index=True)
+    latest_semester_at = db.Column(db.DateTime)
+    sgpa_history = db.Column(db.LargeBinary, nullable=False, default=b'', server_default='')  # uint16 SGPA * 100 per semester
+    
+    # Relationship with semesters (ordered so it can be eager-loaded in one pass)
+    semesters = db.relationship('Semester', backref='student', lazy='select', cascade='all, delete-orphan',
+                                order_by='[Semester.created_at, Semester.id]')
     
     def get_latest_semester(self):
         """Get the most recent semester"""
@@ -41,9 +66,34 @@ class Student(db.Model):
         """Get all semesters ordered by creation date"""
         return Semester.query.filter_by(student_id=self.id).order_by(asc(Semester.created_at)).all()
     
+    def get_semester_count(self):
+        """Count semesters without loading them"""
+        return Semester.query.filter_by(student_id=self.id).count()
+    
+    @classmethod
+    def get_version(cls, student_id):
+        """Student updated_at plus semester count, latest id and latest update, without loading rows"""
+        return db.session.query(
+            cls.updated_at,
+            func.count(Semester.id),
+            func.max(Semester.id),
+            func.max(Semester.updated_at),
+        ).outerjoin(Semester, Semester.student_id == cls.id).filter(cls.id == student_id).group_by(cls.id).first()
+    
+    @staticmethod
+    def pack_sgpa_history(sgpas):
+        """Pack SGPA values (two decimals) into little-endian uint16 hundredths"""
+        return struct.pack(f'<{len(sgpas)}H', *(int(round(sgpa * 100)) for sgpa in sgpas))
+    
+    @staticmethod
+    def unpack_sgpa_history(packed):
+        """SGPA values from a packed history"""
+        packed = packed or b''
+        return [value / 100 for value in struct.unpack(f'<{len(packed) // 2}H', packed)]
+    
     def get_sgpa_growth(self):
-        """Get SGPA values for all semesters"""
-        return [sem.sgpa for sem in self.get_all_semesters()]
+        """Get SGPA values for all semesters from the rollup, without loading them"""
+        return self.unpack_sgpa_history(self.sgpa_history)
     
     def __repr__(self):
         return f'<Student {self.user.username}>'
@@ -51,43 +101,124 @@ class Student(db.Model):
 class Semester(db.Model):
     """Semester model for storing semester-wise academic data"""
     __tablename__ = 'semesters'
+    __table_args__ = (
+        db.Index('ix_semesters_semester_number_sgpa', 'semester_number', 'sgpa'),
+        # Covers the per-student version lookup used for dashboard ETags
+        db.Index('ix_semesters_student_id_updated_at', 'student_id', 'updated_at'),
+        # Per-student semesters in dashboard order (login, relationship loads, rollups, report cards)
+        db.Index('ix_semesters_student_id_created_at', 'student_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
-    semester_number = db.Column(db.Integer, nullable=False)
-    subjects = db.Column(db.Text, nullable=False)  # JSON string of subjects list
-    marks = db.Column(db.Text, nullable=False)     # JSON string of marks list
-    sgpa = db.Column(db.Float, nullable=False)
+    # active_history keeps the previous value available to flush listeners (cohort aggregates)
+    semester_number = db.column_property(db.Column(db.Integer, nullable=False), active_history=True)
+    sgpa = db.column_property(db.Column(db.Float, nullable=False), active_history=True)
     total_marks = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    # Per-subject marks, one row per (semester, position)
+    mark_rows = db.relationship('SemesterMark', backref='semester', lazy='select', cascade='all, delete-orphan',
+                                order_by='SemesterMark.position')
+    
+    def _resize_mark_rows(self, size):
+        """Grow or shrink mark rows so there is one per position"""
+        rows = self.mark_rows
+        while len(rows) < size:
+            rows.append(SemesterMark(position=len(rows), subject_code='', mark=0))
+        del rows[size:]
+        return rows
     
     def get_subjects(self):
         """Get subjects as a list"""
-        return json.loads(self.subjects)
+        return [row.subject_code for row in self.mark_rows]
     
     def set_subjects(self, subjects_list):
         """Set subjects from a list"""
-        self.subjects = json.dumps(subjects_list)
+        rows = self._resize_mark_rows(len(subjects_list))
+        for row, subject in zip(rows, subjects_list):
+            row.subject_code = subject
     
+    @profile_span('semester_marks')
     def get_marks(self):
         """Get marks as a list"""
-        return json.loads(self.marks)
+        return [row.mark for row in self.mark_rows]
+    
+    @staticmethod
+    def compute_scores(marks_list):
+        """Total marks and SGPA for a list of marks"""
+        total = sum(marks_list)
+        return total, round(total / len(marks_list) / 10, 2)
     
     def set_marks(self, marks_list):
         """Set marks from a list"""
-        self.marks = json.dumps(marks_list)
-        self.total_marks = sum(marks_list)
-        self.sgpa = round(sum(marks_list) / len(marks_list) / 10, 2)
+        rows = self._resize_mark_rows(len(marks_list))
+        for row, mark in zip(rows, marks_list):
+            row.mark = mark
+        self.total_marks, self.sgpa = self.compute_scores(marks_list)
     
+    @profile_span('semester_marks')
     def to_dict(self):
         """Convert semester to dictionary (similar to JSON format)"""
+        rows = self.mark_rows
         return {
-            'subjects': self.get_subjects(),
-            'marks': self.get_marks(),
+            'subjects': [row.subject_code for row in rows],
+            'marks': [row.mark for row in rows],
             'sgpa': self.sgpa,
             'total': self.total_marks,
             'timestamp': self.created_at.isoformat()
         }
     
     def __repr__(self):
-        return f'<Semester {self.semester_number} for Student {self.student_id}>'
\ No newline at end of file
+        return f'<Semester {self.semester_number} for Student {self.student_id}>'
+
+class SemesterMark(db.Model):
+    """Mark obtained in a single subject of a semester"""
+    __tablename__ = 'semester_marks'
+    
+    semester_id = db.Column(db.Integer, db.ForeignKey('semesters.id', ondelete='CASCADE'), primary_key=True)
+    position = db.Column(db.SmallInteger, primary_key=True)  # Order of the subject within the semester
+    subject_code = db.column_property(db.Column(db.String(16), nullable=False, index=True), active_history=True)
+    mark = db.column_property(db.Column(db.SmallInteger, nullable=False), active_history=True)
+    
+    def __repr__(self):
+        return f'<SemesterMark {self.subject_code}={self.mark} for Semester {self.semester_id}>'
+
+class SecurityEvent(db.Model):
+    """Audit trail of security events written by the background event logger"""
+    __tablename__ = 'security_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+    event = db.Column(db.String(40), nullable=False, index=True)
+    username = db.Column(db.String(80), index=True)
+    ip = db.Column(db.String(64))
+    details = db.Column(db.Text)
+    
+    def __repr__(self):
+        return f'<SecurityEvent {self.event} for {self.username}>'
+
+class CohortSgpaBucket(db.Model):
+    """Incrementally maintained SGPA histogram per semester number (0.1 wide buckets)"""
+    __tablename__ = 'cohort_sgpa_buckets'
+    
+    semester_number = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.SmallInteger, primary_key=True)  # floor(sgpa * 10), 0-100
+    count = db.Column(db.Integer, nullable=False, default=0)
+    sgpa_sum = db.Column(db.Float, nullable=False, default=0.0)
+    sgpa_sq_sum = db.Column(db.Float, nullable=False, default=0.0)
+    
+    def __repr__(self):
+        return f'<CohortSgpaBucket sem {self.semester_number} bucket {self.bucket}: {self.count}>'
+
+class CohortSubjectMark(db.Model):
+    """Incrementally maintained count of each mark per subject"""
+    __tablename__ = 'cohort_subject_marks'
+    
+    subject_code = db.Column(db.String(16), primary_key=True)
+    mark = db.Column(db.SmallInteger, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<CohortSubjectMark {self.subject_code}={self.mark}: {self.count}>'
@@ -0,0 +1,127 @@
+import hashlib
+import hmac
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt
+
+from metrics import PASSWORD_HASH_PENDING, PASSWORD_HASH_REJECTED
+
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+# Cost used to time the machine; each extra round doubles the work
+PROBE_ROUNDS = 8
+BCRYPT_PREFIXES = ('$2a$', '$2b$', '$2y$')
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool is saturated; the request should be shed with a 503"""
+
+    def __init__(self, retry_after):
+        super().__init__('Password hashing pool is saturated')
+        self.retry_after = retry_after
+
+
+def calibrate_rounds(target_ms, min_rounds=MIN_ROUNDS, max_rounds=MAX_ROUNDS):
+    """Largest bcrypt cost whose hash takes no more than target_ms on this machine (within bounds)"""
+    salt = bcrypt.gensalt(PROBE_ROUNDS)
+    started = time.perf_counter()
+    bcrypt.hashpw(b'calibration probe', salt)
+    probe_ms = max((time.perf_counter() - started) * 1000, 1e-3)
+    rounds = PROBE_ROUNDS + math.floor(math.log2(target_ms / probe_ms))
+    return max(min_rounds, min(max_rounds, rounds))
+
+
+def is_bcrypt(stored_password):
+    return stored_password.startswith(BCRYPT_PREFIXES)
+
+
+def bcrypt_rounds(stored_password):
+    """Cost factor recorded in a bcrypt hash"""
+    return int(stored_password.split('$')[2])
+
+
+def verify_legacy(stored_password, provided_password):
+    """Check a pre-bcrypt entry: salted SHA-256 ('salt:hexdigest') or plain text"""
+    try:
+        salt, stored_hash = stored_password.split(':')
+    except ValueError:
+        # Handle legacy plain text passwords (migration case)
+        return hmac.compare_digest(stored_password.encode(), provided_password.encode())
+    pwd_hash = hashlib.sha256((provided_password + salt).encode()).hexdigest()
+    return hmac.compare_digest(pwd_hash, stored_hash)
+
+
+class PasswordHasher:
+    """bcrypt hashing on a small bounded thread pool with load shedding
+
+    bcrypt releases the GIL, so hashes run in parallel with request threads
+    without starving them, and the pool size caps how many cores logins can
+    take per process. At most `workers + max_pending` hashes are in flight;
+    beyond that, or when a queued hash would wait longer than `timeout`,
+    HasherBusy is raised straight away instead of letting logins pile up.
+    The cost factor is calibrated to `target_ms` unless `rounds` is fixed.
+    Threads are started on first use, never at import.
+    """
+
+    def __init__(self, target_ms=250, rounds=0, workers=1, max_pending=16, timeout=5.0):
+        self.target_ms = target_ms
+        self.rounds = rounds or None
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def calibrate(self):
+        """Fix the cost factor for this process (a no-op once set)"""
+        if self.rounds is None:
+            self.rounds = calibrate_rounds(self.target_ms)
+        return self.rounds
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            PASSWORD_HASH_REJECTED.labels(reason='queue_full').inc()
+            raise HasherBusy(retry_after=max(1, math.ceil(self.target_ms / 1000)))
+        PASSWORD_HASH_PENDING.inc()
+        try:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is freed when the hash finishes or is cancelled, not when a timed-out caller gives up on it
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            PASSWORD_HASH_REJECTED.labels(reason='timeout').inc()
+            raise HasherBusy(retry_after=max(1, math.ceil(self.timeout)))
+
+    def _release(self, future=None):
+        PASSWORD_HASH_PENDING.dec()
+        self._slots.release()
+
+    def hash(self, password):
+        """bcrypt hash of a password at the calibrated cost"""
+        salt = bcrypt.gensalt(self.calibrate())
+        return self._run(bcrypt.hashpw, password.encode(), salt).decode()
+
+    def verify(self, stored_password, provided_password):
+        """Check a password against a bcrypt hash or a legacy entry (legacy checks are cheap and run inline)"""
+        if not is_bcrypt(stored_password):
+            return verify_legacy(stored_password, provided_password)
+        return self._run(bcrypt.checkpw, provided_password.encode(), stored_password.encode())
+
+    def needs_rehash(self, stored_password):
+        """True for legacy entries and bcrypt hashes below the current cost"""
+        return not is_bcrypt(stored_password) or bcrypt_rounds(stored_password) < self.calibrate()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
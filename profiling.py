@@ -0,0 +1,230 @@
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import random
+import time
+import uuid
+from datetime import datetime
+from functools import wraps
+from hashlib import sha256
+
+import click
+from flask import g, has_app_context, request, template_rendered, before_render_template
+from sqlalchemy import event
+
+HEADER = 'X-Profile-Token'
+TOKEN_TTL = 300
+MAX_STATEMENT_LENGTH = 500
+TOP_FUNCTIONS = 25
+
+# Flipped once by init_profiling; while False every hook below is a single global check
+_enabled = False
+
+
+class RequestProfile:
+    """Timings collected for one profiled request"""
+
+    def __init__(self, reason):
+        self.reason = reason
+        self.started = time.perf_counter()
+        self.statements = []
+        self.spans = {}
+        self.profiler = cProfile.Profile()
+
+    def add_span(self, name, elapsed):
+        span = self.spans.setdefault(name, [0, 0.0])
+        span[0] += 1
+        span[1] += elapsed
+
+
+def _current():
+    return g.get('request_profile') if has_app_context() else None
+
+
+def profile_span(name):
+    """Decorator attributing a function's time to a named span on profiled requests"""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            profile = _current() if _enabled else None
+            if profile is None:
+                return f(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                profile.add_span(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def sign(secret, path, expires):
+    return hmac.new(secret.encode(), f'{expires}:{path}'.encode(), sha256).hexdigest()
+
+
+def make_token(secret, path, ttl=TOKEN_TTL):
+    """Header value that forces profiling of `path` for the next `ttl` seconds"""
+    expires = int(time.time()) + ttl
+    return f'{expires}:{sign(secret, path, expires)}'
+
+
+def verify_token(secret, path, token):
+    try:
+        expires, signature = token.split(':', 1)
+        expires = int(expires)
+    except ValueError:
+        return False
+    return expires >= time.time() and hmac.compare_digest(signature, sign(secret, path, expires))
+
+
+def _summary(profile, response, duration):
+    stats = pstats.Stats(profile.profiler)
+    functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+    sql_total = sum(duration for _, duration in profile.statements)
+    return {
+        'timestamp': datetime.utcnow().isoformat(),
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'reason': profile.reason,
+        'duration_ms': round(duration * 1000, 3),
+        'sql': {
+            'count': len(profile.statements),
+            'total_ms': round(sql_total * 1000, 3),
+            'statements': [
+                {'statement': statement[:MAX_STATEMENT_LENGTH], 'duration_ms': round(elapsed * 1000, 3)}
+                for statement, elapsed in profile.statements
+            ],
+        },
+        'spans': {
+            name: {'count': count, 'total_ms': round(total * 1000, 3)}
+            for name, (count, total) in sorted(profile.spans.items())
+        },
+        'top_functions': [
+            {'function': f'{filename}:{line}({name})', 'calls': calls,
+             'own_ms': round(own * 1000, 3), 'cumulative_ms': round(cumulative * 1000, 3)}
+            for (filename, line, name), (_, calls, own, cumulative, _) in functions
+        ],
+    }
+
+
+def _prune(directory, max_files):
+    """Keep only the newest max_files profiles (each is a .prof/.json pair)"""
+    summaries = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+    for name in summaries[:max(0, len(summaries) - max_files)]:
+        base = os.path.join(directory, name[:-len('.json')])
+        for path in (base + '.json', base + '.prof'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def write_profile(directory, max_files, profile, response, duration):
+    """Write <id>.prof (pstats) and <id>.json (summary), returns the id"""
+    os.makedirs(directory, exist_ok=True)
+    profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{request.endpoint or 'unknown'}-{uuid.uuid4().hex[:8]}"
+    base = os.path.join(directory, profile_id)
+    profile.profiler.dump_stats(base + '.prof')
+    with open(base + '.json', 'w', encoding='utf-8') as handle:
+        json.dump(_summary(profile, response, duration), handle, indent=2)
+    _prune(directory, max_files)
+    return profile_id
+
+
+def init_profiling(app, db):
+    """Profile sampled or explicitly requested requests and keep the slow ones
+
+    A request is profiled when it wins the PROFILE_SAMPLE_RATE draw or
+    carries a valid X-Profile-Token header (see `flask profile-token`).
+    Sampled requests are written to PROFILE_DIR only if they take longer
+    than PROFILE_SLOW_MS; header-requested ones are always written. With
+    both triggers off, no hooks are installed at all.
+    """
+    global _enabled
+    sample_rate = app.config['PROFILE_SAMPLE_RATE']
+    secret = app.config['PROFILE_SECRET']
+    if sample_rate <= 0 and not secret:
+        return
+    _enabled = True
+    directory = app.config['PROFILE_DIR']
+    slow_seconds = app.config['PROFILE_SLOW_MS'] / 1000
+    max_files = app.config['PROFILE_MAX_FILES']
+
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    def start_statement(conn, cursor, statement, parameters, context, executemany):
+        if _current() is not None:
+            conn.info.setdefault('profile_started', []).append(time.perf_counter())
+
+    def end_statement(conn, cursor, statement, parameters, context, executemany):
+        profile = _current()
+        if profile is not None and conn.info.get('profile_started'):
+            elapsed = time.perf_counter() - conn.info['profile_started'].pop()
+            profile.statements.append((statement, elapsed))
+            profile.add_span('sql', elapsed)
+
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', start_statement)
+        event.listen(engine, 'after_cursor_execute', end_statement)
+
+    def start_render(sender, template, context, **extra):
+        if _current() is not None:
+            g.profile_render_started = time.perf_counter()
+
+    def end_render(sender, template, context, **extra):
+        profile = _current()
+        if profile is not None and 'profile_render_started' in g:
+            profile.add_span('template', time.perf_counter() - g.pop('profile_render_started'))
+
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(end_render, app, weak=False)
+
+    @app.before_request
+    def start_profile():
+        if request.endpoint in (None, 'static'):
+            return
+        token = request.headers.get(HEADER)
+        if secret and token and verify_token(secret, request.path, token):
+            reason = 'header'
+        elif sample_rate > 0 and random.random() < sample_rate:
+            reason = 'sample'
+        else:
+            return
+        profile = g.request_profile = RequestProfile(reason)
+        profile.profiler.enable()
+
+    @app.after_request
+    def finish_profile(response):
+        profile = g.pop('request_profile', None)
+        if profile is None:
+            return response
+        profile.profiler.disable()
+        duration = time.perf_counter() - profile.started
+        if profile.reason == 'header' or duration >= slow_seconds:
+            response.headers['X-Profile-Id'] = write_profile(directory, max_files, profile, response, duration)
+        return response
+
+    @app.teardown_request
+    def discard_profile(error):
+        # after_request is skipped when the view raised; never leave the profiler running
+        profile = g.pop('request_profile', None)
+        if profile is not None:
+            profile.profiler.disable()
+
+
+def register_commands(app):
+    """Register the profile-token CLI command on the app"""
+
+    @app.cli.command('profile-token')
+    @click.argument('path')
+    @click.option('--ttl', default=TOKEN_TTL, show_default=True, help='Seconds the token stays valid.')
+    def profile_token(path, ttl):
+        """Print an X-Profile-Token header value that forces profiling of PATH."""
+        if not app.config['PROFILE_SECRET']:
+            raise click.ClickException('PROFILE_SECRET is not configured')
+        click.echo(f"{HEADER}: {make_token(app.config['PROFILE_SECRET'], path, ttl)}")
@@ -0,0 +1,48 @@
+from flask import g, request
+from sqlalchemy import event
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a view issues more SQL statements than it declared"""
+
+
+def query_budget(max_statements):
+    """Declare the maximum number of SQL statements a view may issue"""
+    def decorator(f):
+        f.query_budget = max_statements
+        return f
+    return decorator
+
+
+def init_query_counter(app, db):
+    """Count SQL statements per request and enforce declared budgets
+
+    Counting is always on (it is a single increment per statement).
+    Budgets are only enforced when QUERY_BUDGET_ENFORCE is set, which is
+    the default under TESTING so regressions fail the test run.
+    """
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        try:
+            g.sql_statements = g.get('sql_statements', 0) + 1
+        except RuntimeError:
+            # Statement issued outside of an app context (CLI, startup)
+            pass
+
+    # Primary and replica statements count against the same budget
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', count_statement)
+
+    @app.after_request
+    def check_query_budget(response):
+        view = app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', None)
+        used = g.get('sql_statements', 0)
+        enforce = app.config.get('QUERY_BUDGET_ENFORCE', app.config.get('TESTING', False))
+        if budget is not None and used > budget and enforce:
+            raise QueryBudgetExceeded(
+                f'{request.endpoint} issued {used} SQL statements (budget {budget})'
+            )
+        return response
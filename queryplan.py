@@ -0,0 +1,158 @@
+import json
+import re
+from contextlib import contextmanager
+
+import click
+from sqlalchemy import event, func, select
+
+from models import db, User, Student, Semester
+
+# Planners legitimately scan small tables, so plans are only meaningful on a seeded cohort
+MIN_STUDENTS = 5000
+SAMPLE_STUDENTS = 50
+SQLITE_TABLE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+SQLITE_SUBQUERY = re.compile(r'^(?:CO-ROUTINE|MATERIALIZE) (?:SUBQUERY )?(\w+)')
+
+
+def _hot_queries():
+    """(name, callable(sample)) for every query on the login, dashboard and staff read paths"""
+    from export import report_card_page
+    from ranking import CUMULATIVE, leaderboard
+    from rollups import _semester_rows
+
+    return [
+        ('login: user with student', lambda s: User.load_with_student(s['username'])),
+        ('dashboard: user, student, semesters and marks', lambda s: User.load_with_semesters(s['username'])),
+        ('dashboard: version validators', lambda s: Student.get_version(s['student_id'])),
+        ('student.semesters', lambda s: db.session.get(Student, s['student_id']).semesters),
+        ('get_latest_semester', lambda s: db.session.get(Student, s['student_id']).get_latest_semester()),
+        ('get_all_semesters', lambda s: db.session.get(Student, s['student_id']).get_all_semesters()),
+        ('get_semester_count', lambda s: db.session.get(Student, s['student_id']).get_semester_count()),
+        ('rollup refresh', lambda s: _semester_rows(db.session.connection(), s['student_ids'])),
+        ('report cards page', lambda s: report_card_page(student_ids=s['student_ids'], limit=len(s['student_ids']))),
+        ('leaderboard: semester', lambda s: leaderboard(s['semester_number'], 1, 20)),
+        ('leaderboard: cumulative', lambda s: leaderboard(CUMULATIVE, 1, 20)),
+    ]
+
+
+@contextmanager
+def capture_statements(engine):
+    """Collect (statement, parameters) for every single-row-set SELECT the engine runs"""
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith('SELECT'):
+            captured.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def explain(conn, statement, parameters):
+    """Plan lines for a statement and the tables it reads in full (table or full index scans)"""
+    if conn.dialect.name == 'postgresql':
+        document = conn.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + statement, parameters).scalar()
+        if isinstance(document, str):
+            document = json.loads(document)
+        lines, scans = [], []
+        pending = [(document[0]['Plan'], 0)]
+        while pending:
+            node, depth = pending.pop()
+            relation = node.get('Relation Name')
+            lines.append('  ' * depth + node['Node Type'] + (f' on {relation}' if relation else ''))
+            if node['Node Type'] == 'Seq Scan':
+                scans.append(relation)
+            pending.extend((child, depth + 1) for child in reversed(node.get('Plans', [])))
+        return lines, scans
+
+    rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+    lines = [row[-1] for row in rows]
+    # Scanning a subquery's rows (e.g. the LIMIT 1 user under a joined eager load) reads no table
+    subqueries = {match.group(1) for match in map(SQLITE_SUBQUERY.match, lines) if match}
+    scans = []
+    for detail in lines:
+        match = SQLITE_TABLE_SCAN.match(detail)
+        # 'SCAN t USING [COVERING] INDEX ...' still visits every row, just in index order; only SEARCH is a lookup
+        if match and match.group(1) not in subqueries | {'CONSTANT'}:
+            scans.append(match.group(1))
+        elif 'AUTOMATIC' in detail:
+            # SQLite builds a throwaway index by reading the whole table when no real one fits
+            scans.append(detail.split()[1])
+    return lines, scans
+
+
+def _sample(limit=SAMPLE_STUDENTS):
+    """A student from the middle of the cohort plus a run of student ids for the batch queries"""
+    count = db.session.scalar(select(func.count(Student.id)))
+    student_id, username = db.session.execute(
+        select(Student.id, User.username).join(User, User.id == Student.user_id)
+        .order_by(Student.id).offset(count // 2).limit(1)
+    ).one()
+    student_ids = db.session.scalars(
+        select(Student.id).where(Student.id >= student_id).order_by(Student.id).limit(limit)
+    ).all()
+    semester_number = db.session.scalar(select(Semester.semester_number).where(Semester.student_id == student_id).limit(1))
+    return {'student_id': student_id, 'username': username, 'student_ids': student_ids,
+            'semester_number': semester_number or 1}
+
+
+def check_query_plans(analyze=False):
+    """Run every hot query, EXPLAIN what it sent to the database and report full table scans
+
+    Returns a list of {'name', 'statement', 'plan', 'scans'} entries, one
+    per statement issued.
+    """
+    engine = db.engine
+    if analyze:
+        with engine.begin() as conn:
+            conn.exec_driver_sql('ANALYZE')
+    sample = _sample()
+    results = []
+    for name, run in _hot_queries():
+        # Start from an empty identity map so relationship and get() loads really hit the database
+        db.session.expunge_all()
+        with capture_statements(engine) as captured:
+            run(sample)
+        with engine.connect() as conn:
+            for statement, parameters in captured:
+                plan, scans = explain(conn, statement, parameters)
+                results.append({'name': name, 'statement': statement, 'plan': plan, 'scans': scans})
+    db.session.rollback()
+    return results
+
+
+def report_lines(results, verbose=False):
+    """Printable plan report: every statement that scans a table (all of them when verbose)"""
+    for result in results:
+        if verbose or result['scans']:
+            status = 'TABLE SCAN ' + ', '.join(result['scans']) if result['scans'] else 'ok'
+            yield f"{result['name']}: {status}"
+            yield f"  {result['statement']}"
+            for line in result['plan']:
+                yield f'    {line}'
+
+
+def register_commands(app):
+    """Register the check-query-plans CLI command on the app"""
+
+    @app.cli.command('check-query-plans')
+    @click.option('--analyze', is_flag=True, help='Refresh planner statistics (ANALYZE) first.')
+    @click.option('--min-students', default=MIN_STUDENTS, show_default=True,
+                  help='Refuse to judge plans on a smaller cohort.')
+    @click.option('--verbose', is_flag=True, help='Print every plan, not only regressions.')
+    def check_query_plans_command(analyze, min_students, verbose):
+        """EXPLAIN every hot query and fail if any of them reads a whole table."""
+        students = db.session.scalar(select(func.count(Student.id)))
+        if students < min_students:
+            raise click.ClickException(f'Only {students} students; seed at least {min_students} '
+                                       '(`flask seed-cohort`) so the planner has realistic statistics')
+        results = check_query_plans(analyze)
+        failures = [result for result in results if result['scans']]
+        for line in report_lines(results, verbose):
+            click.echo(line)
+        if failures:
+            raise click.ClickException(f'{len(failures)} of {len(results)} hot statements do full table scans')
+        click.echo(f'All {len(results)} hot statements use indexes ({db.engine.dialect.name}, {students} students)')
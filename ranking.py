@@ -0,0 +1,208 @@
+import threading
+import time
+
+from sqlalchemy import event, func, inspect, select
+
+from models import db, Student, Semester
+
+SGPA_SLOTS = 1001  # 0.00 - 10.00 in steps of 0.01
+CUMULATIVE = 'cumulative'
+
+
+def sgpa_slot(sgpa):
+    """Fenwick slot for an SGPA value"""
+    return max(0, min(SGPA_SLOTS - 1, int(round(sgpa * 100))))
+
+
+class FenwickTree:
+    """Binary indexed tree of counts with O(log n) updates and prefix sums"""
+
+    def __init__(self, size=SGPA_SLOTS):
+        self.size = size
+        self.total = 0
+        self._tree = [0] * (size + 1)
+
+    def add(self, slot, delta=1):
+        self.total += delta
+        i = slot + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix(self, slot):
+        """Number of values in slots 0..slot"""
+        total = 0
+        i = min(slot, self.size - 1) + 1
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+
+class RankIndex:
+    """SGPA rank index per semester number and for cumulative GPA
+
+    Memory is one Fenwick tree of SGPA_SLOTS counters per scope, regardless
+    of how many students there are. Each worker process keeps its own copy;
+    local writes are applied immediately and the whole index is rebuilt
+    from the database every `refresh_interval` seconds so workers converge.
+    """
+
+    def __init__(self, refresh_interval=300):
+        self.refresh_interval = refresh_interval
+        self._trees = {}
+        self._lock = threading.Lock()
+        self._built_at = 0.0
+        self._refreshing = False
+
+    def _tree(self, scope):
+        tree = self._trees.get(scope)
+        if tree is None:
+            tree = self._trees[scope] = FenwickTree()
+        return tree
+
+    def build(self):
+        """Rebuild every tree from grouped counts in the database"""
+        # Values are grouped in SQL but slotted by sgpa_slot(), exactly as incremental updates are;
+        # SQL ROUND() breaks .5 ties differently from Python, which would misplace CGPAs such as 7.125
+        trees = {}
+        for number, value, count in db.session.execute(
+                select(Semester.semester_number, Semester.sgpa, func.count())
+                .group_by(Semester.semester_number, Semester.sgpa)):
+            trees.setdefault(number, FenwickTree()).add(sgpa_slot(value), count)
+
+        cumulative = trees[CUMULATIVE] = FenwickTree()
+        for value, count in db.session.execute(
+                select(Student.cgpa, func.count()).where(Student.cgpa.isnot(None)).group_by(Student.cgpa)):
+            cumulative.add(sgpa_slot(value), count)
+
+        with self._lock:
+            self._trees = trees
+            self._built_at = time.monotonic()
+
+    def maybe_refresh(self, app):
+        """Rebuild in a background thread once the index is older than refresh_interval"""
+        with self._lock:
+            if self._refreshing or time.monotonic() - self._built_at < self.refresh_interval:
+                return
+            self._refreshing = True
+
+        def refresh():
+            try:
+                with app.app_context():
+                    self.build()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+        threading.Thread(target=refresh, name='rank-index-refresh', daemon=True).start()
+
+    def update(self, scope, old_sgpa, new_sgpa):
+        """Move one value between slots (None means added or removed)"""
+        with self._lock:
+            tree = self._tree(scope)
+            if old_sgpa is not None:
+                tree.add(sgpa_slot(old_sgpa), -1)
+            if new_sgpa is not None:
+                tree.add(sgpa_slot(new_sgpa), 1)
+
+    def rank(self, scope, sgpa):
+        """Rank (1 = best, ties share a rank), percentile and population size"""
+        with self._lock:
+            tree = self._trees.get(scope)
+            if tree is None or tree.total == 0:
+                return None
+            slot = sgpa_slot(sgpa)
+            at_or_below = tree.prefix(slot)
+            total = tree.total
+        return {
+            'rank': total - at_or_below + 1,
+            'percentile': round(100 * at_or_below / total, 2),
+            'total': total,
+        }
+
+
+def _student_cgpas(student_ids):
+    if not student_ids:
+        return {}
+    # Read from the rollup columns, which the same flush keeps current
+    return dict(db.session.execute(
+        select(Student.id, Student.cgpa).where(Student.id.in_(student_ids))
+    ).all())
+
+
+def register_rank_maintenance(session, index):
+    """Apply committed semester writes to the local rank index"""
+
+    @event.listens_for(session, 'before_flush')
+    def collect_changes(sess, flush_context, instances):
+        pending = sess.info.setdefault('rank_changes', [])
+        students = sess.info.setdefault('rank_students', {})
+        changed = set()
+        for obj in sess.new:
+            if isinstance(obj, Semester) and obj.sgpa is not None:
+                pending.append((obj.semester_number, None, obj.sgpa))
+                changed.add(obj.student_id)
+        for obj in sess.dirty:
+            if isinstance(obj, Semester):
+                history = inspect(obj).attrs.sgpa.history
+                if history.has_changes():
+                    pending.append((obj.semester_number, history.deleted[0] if history.deleted else None, obj.sgpa))
+                    changed.add(obj.student_id)
+        for obj in sess.deleted:
+            if isinstance(obj, Semester):
+                pending.append((obj.semester_number, obj.sgpa, None))
+                changed.add(obj.student_id)
+        # Remember each student's cumulative GPA before this transaction touched it
+        new_students = [student_id for student_id in changed if student_id is not None and student_id not in students]
+        if new_students:
+            with sess.no_autoflush:
+                before = _student_cgpas(new_students)
+            for student_id in new_students:
+                students[student_id] = before.get(student_id)
+
+    @event.listens_for(session, 'before_commit')
+    def collect_cumulative(sess):
+        # Flush first so semesters added just before commit are collected too
+        sess.flush()
+        students = sess.info.get('rank_students')
+        if students:
+            after = _student_cgpas(list(students))
+            sess.info['rank_cumulative'] = [(before, after.get(student_id)) for student_id, before in students.items()]
+
+    @event.listens_for(session, 'after_commit')
+    def apply_changes(sess):
+        for number, old, new in sess.info.pop('rank_changes', []):
+            index.update(number, old, new)
+        for old, new in sess.info.pop('rank_cumulative', []):
+            index.update(CUMULATIVE, old, new)
+        sess.info.pop('rank_students', None)
+
+    @event.listens_for(session, 'after_rollback')
+    def discard_changes(sess):
+        for key in ('rank_changes', 'rank_students', 'rank_cumulative'):
+            sess.info.pop(key, None)
+
+
+def leaderboard(scope, page, per_page):
+    """One page of the top-N list for a semester number or cumulative GPA"""
+    from models import User
+
+    if scope == CUMULATIVE:
+        # One row per student, walked in students.cgpa index order
+        query = (
+            select(User.username, Student.cgpa.label('score'))
+            .join(Student, Student.user_id == User.id)
+            .where(Student.cgpa.isnot(None))
+            .order_by(Student.cgpa.desc(), Student.id)
+        )
+    else:
+        query = (
+            select(User.username, Semester.sgpa.label('score'))
+            .join(Student, Student.user_id == User.id)
+            .join(Semester, Semester.student_id == Student.id)
+            .where(Semester.semester_number == scope)
+            .order_by(Semester.sgpa.desc(), Semester.id)
+        )
+    rows = db.session.execute(query.limit(per_page).offset((page - 1) * per_page)).all()
+    # Rounded here rather than with SQL ROUND() so .5 ties agree with sgpa_slot() and the dashboard
+    return [{'username': username, 'sgpa': round(score, 2)} for username, score in rows]
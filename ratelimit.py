@@ -0,0 +1,215 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def _estimate(window_start, current, previous, now, window):
+    """Sliding-window estimate from the current and previous fixed windows"""
+    elapsed = now - window_start
+    if elapsed >= 2 * window:
+        return 0.0
+    if elapsed >= window:
+        # The stored current window has become the previous one
+        return current * (1 - (elapsed - window) / window)
+    return previous * (1 - elapsed / window) + current
+
+
+def _roll(window_start, current, previous, now, window):
+    """Advance the fixed windows so that now falls in the current one"""
+    if now - window_start >= 2 * window:
+        return now, 0, 0
+    if now - window_start >= window:
+        return window_start + window, 0, current
+    return window_start, current, previous
+
+
+def _retry_after(window_start, current, previous, now, window, limit):
+    """Seconds until the sliding-window estimate drops below the limit"""
+    window_start, current, previous = _roll(window_start, current, previous, now, window)
+    elapsed = now - window_start
+    if current >= limit:
+        # Wait until the current window has aged enough as the previous one
+        return max(1, int(window_start + window + window * (1 - limit / current) - now) + 1)
+    if previous:
+        # previous * (1 - t / window) + current < limit
+        t = window * (1 - (limit - current) / previous)
+        return max(1, int(t - elapsed) + 1)
+    return 0
+
+
+class MemoryBackend:
+    """Per-process store with a hard key cap and expiry-ordered eviction
+
+    Entries are re-inserted at the end on every write and a write always
+    extends expiry, so the OrderedDict stays sorted by expiry time and both
+    expiry and capacity eviction pop from the front.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry[0]
+
+    def update(self, key, fn, now, ttl):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            state = fn(entry[0] if entry and entry[1] > now else None)
+            self._data[key] = (state, now + ttl)
+            self._evict(now)
+            return state
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def _evict(self, now):
+        while self._data:
+            key, (state, expires_at) = next(iter(self._data.items()))
+            if expires_at > now and len(self._data) <= self.max_keys:
+                break
+            del self._data[key]
+
+    def size(self):
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """Store shared by all worker processes through a SQLite file in WAL mode
+
+    The file is opened (and its table created) on first use in each
+    process, so constructing the backend at import touches nothing.
+    `max_keys` is a hard cap: inserting a new key evicts the keys closest
+    to expiry in the same write transaction, so concurrent workers cannot
+    overshoot it. Expired keys are swept every CLEANUP_EVERY writes per
+    process.
+    """
+
+    CLEANUP_EVERY = 500
+
+    def __init__(self, path, max_keys=100000):
+        self.path = path
+        self.max_keys = max_keys
+        self._local = threading.local()
+        self._writes = 0
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+            self._create_schema(conn)
+        return conn
+
+    def _create_schema(self, conn):
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limits ('
+                'key TEXT PRIMARY KEY, window_start REAL, current INTEGER, previous INTEGER, expires_at REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_rate_limits_expires_at ON rate_limits (expires_at)')
+            self._schema_ready = True
+
+    def get(self, key):
+        row = self._conn().execute(
+            'SELECT window_start, current, previous, expires_at FROM rate_limits WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or row[3] <= time.time():
+            return None
+        return row[:3]
+
+    def update(self, key, fn, now, ttl):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT window_start, current, previous FROM rate_limits WHERE key = ?', (key,)
+            ).fetchone()
+            state = fn(row)
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limits (key, window_start, current, previous, expires_at) '
+                'VALUES (?, ?, ?, ?, ?)', (key, *state, now + ttl)
+            )
+            if row is None:
+                # Only new keys grow the table; the one just written expires last, so it is never evicted
+                self._evict_excess(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._writes += 1
+        if self._writes % self.CLEANUP_EVERY == 0:
+            self._evict(now)
+        return state
+
+    def delete(self, key):
+        self._conn().execute('DELETE FROM rate_limits WHERE key = ?', (key,))
+
+    def _evict(self, now):
+        conn = self._conn()
+        conn.execute('DELETE FROM rate_limits WHERE expires_at <= ?', (now,))
+        self._evict_excess(conn)
+
+    def _evict_excess(self, conn):
+        conn.execute(
+            'DELETE FROM rate_limits WHERE key IN ('
+            'SELECT key FROM rate_limits ORDER BY expires_at '
+            'LIMIT MAX(0, (SELECT COUNT(*) FROM rate_limits) - ?))', (self.max_keys,)
+        )
+
+    def size(self):
+        return self._conn().execute('SELECT COUNT(*) FROM rate_limits').fetchone()[0]
+
+
+class RateLimiter:
+    """Sliding-window failure counter with O(1) checks per key"""
+
+    def __init__(self, backend, window):
+        self.backend = backend
+        self.window = window
+
+    def retry_after(self, key, limit):
+        """Seconds the key must wait, or 0 if it is under the limit"""
+        state = self.backend.get(key)
+        if state is None:
+            return 0
+        now = time.time()
+        if _estimate(*state, now, self.window) < limit:
+            return 0
+        return _retry_after(*state, now, self.window, limit)
+
+    def hit(self, key):
+        """Record one failure for the key"""
+        now = time.time()
+
+        def increment(state):
+            window_start, current, previous = _roll(*(state or (now, 0, 0)), now, self.window)
+            return window_start, current + 1, previous
+        self.backend.update(key, increment, now, 2 * self.window)
+
+    def reset(self, key):
+        self.backend.delete(key)
+
+    def size(self):
+        return self.backend.size()
+
+
+def create_rate_limiter(url, window, max_keys):
+    """Create a limiter from a backend URL ('memory' or sqlite:///path)"""
+    if url.startswith('sqlite:///'):
+        return RateLimiter(SQLiteBackend(url[len('sqlite:///'):], max_keys), window)
+    return RateLimiter(MemoryBackend(max_keys), window)
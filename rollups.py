@@ -0,0 +1,204 @@
+import math
+import time
+from datetime import datetime
+
+import click
+from sqlalchemy import bindparam, event, inspect, select, update
+
+from models import db, Student, Semester
+
+ROLLUP_COLUMNS = ('semester_count', 'total_marks', 'latest_sgpa', 'cgpa', 'latest_semester_at', 'sgpa_history')
+# Semester attributes that feed a rollup (created_at decides dashboard order)
+SOURCE_ATTRS = ('sgpa', 'total_marks', 'created_at', 'student_id')
+BATCH_SIZE = 5000
+CGPA_TOLERANCE = 1e-6
+
+
+def compute_rollup(semesters):
+    """Rollup values for one student's (sgpa, total_marks, created_at) rows in dashboard order"""
+    sgpas = [sgpa for sgpa, _, _ in semesters]
+    return {
+        'semester_count': len(semesters),
+        'total_marks': sum(total for _, total, _ in semesters),
+        'latest_sgpa': sgpas[-1] if sgpas else None,
+        'cgpa': sum(sgpas) / len(sgpas) if sgpas else None,
+        'latest_semester_at': semesters[-1][2] if semesters else None,
+        'sgpa_history': Student.pack_sgpa_history(sgpas),
+    }
+
+
+def append_semester(student, sgpa, total_marks, created_at):
+    """Fold one semester that sorts after all existing ones into a student's rollup"""
+    history = Student.unpack_sgpa_history(student.sgpa_history) + [sgpa]
+    student.semester_count = (student.semester_count or 0) + 1
+    student.total_marks = (student.total_marks or 0) + total_marks
+    student.latest_sgpa = sgpa
+    student.cgpa = sum(history) / len(history)
+    student.latest_semester_at = created_at
+    student.sgpa_history = Student.pack_sgpa_history(history)
+
+
+def _semester_rows(conn, student_ids):
+    """(student_id, sgpa, total_marks, created_at) for the given students in dashboard order"""
+    semesters = Semester.__table__
+    return conn.execute(
+        select(semesters.c.student_id, semesters.c.sgpa, semesters.c.total_marks, semesters.c.created_at)
+        .where(semesters.c.student_id.in_(student_ids))
+        .order_by(semesters.c.student_id, semesters.c.created_at, semesters.c.id)
+    ).all()
+
+
+def refresh_student_rollups(conn, student_ids):
+    """Recompute the rollups of the given students from their semesters (two statements)"""
+    student_ids = sorted(student_id for student_id in set(student_ids) if student_id is not None)
+    if not student_ids:
+        return
+    grouped = {student_id: [] for student_id in student_ids}
+    for student_id, sgpa, total, created_at in _semester_rows(conn, student_ids):
+        grouped[student_id].append((sgpa, total, created_at))
+
+    students = Student.__table__
+    rows = [dict(compute_rollup(semesters), b_id=student_id) for student_id, semesters in grouped.items()]
+    conn.execute(update(students).where(students.c.id == bindparam('b_id')), rows)
+
+
+def _changed(obj):
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in SOURCE_ATTRS)
+
+
+def register_rollup_maintenance(session):
+    """Keep Student rollups in step with semester writes, in the same transaction
+
+    New semesters that sort after a student's latest one are folded into
+    the already loaded Student row, so the common path (a login adding
+    semesters) costs no extra reads. Anything else (edits, deletes,
+    back-dated inserts) marks the student for a recompute after the flush.
+    """
+
+    @event.listens_for(session, 'before_flush')
+    def fold_new_semesters(sess, flush_context, instances):
+        stale = sess.info.setdefault('rollup_stale', set())
+        for obj in sess.dirty:
+            if isinstance(obj, Semester) and _changed(obj):
+                stale.add(obj.student_id)
+                stale.update(inspect(obj).attrs.student_id.history.deleted)
+        for obj in sess.deleted:
+            if isinstance(obj, Semester):
+                stale.add(obj.student_id)
+
+        added = {}
+        with sess.no_autoflush:
+            for obj in sess.new:
+                if isinstance(obj, Semester) and obj.sgpa is not None:
+                    # Pending semesters don't lazy-load their student; the identity map usually has it
+                    student = obj.student or (sess.get(Student, obj.student_id) if obj.student_id else None)
+                    if student is None:
+                        stale.add(obj.student_id)
+                    else:
+                        added.setdefault(student, []).append(obj)
+
+        now = datetime.utcnow()
+        for student, semesters in added.items():
+            if student.id is not None and student.id in stale:
+                continue
+            for semester in semesters:
+                # Same value the column default would give, but known before the insert
+                if semester.created_at is None:
+                    semester.created_at = now
+            semesters.sort(key=lambda sem: sem.created_at)
+            if student.latest_semester_at is not None and semesters[0].created_at < student.latest_semester_at:
+                stale.add(student.id)
+                continue
+            for semester in semesters:
+                append_semester(student, semester.sgpa, semester.total_marks, semester.created_at)
+
+    @event.listens_for(session, 'after_flush_postexec')
+    def refresh_stale(sess, flush_context):
+        stale = sess.info.pop('rollup_stale', None)
+        stale = {student_id for student_id in stale or () if student_id is not None}
+        if not stale:
+            return
+        refresh_student_rollups(sess.connection(), stale)
+        # The Core update bypassed the identity map; reload on next access
+        for student_id in stale:
+            student = sess.identity_map.get(inspect(Student).identity_key_from_primary_key((student_id,)))
+            if student is not None:
+                sess.expire(student, list(ROLLUP_COLUMNS) + ['updated_at'])
+
+    @event.listens_for(session, 'after_rollback')
+    def discard_stale(sess):
+        sess.info.pop('rollup_stale', None)
+
+
+def drifted_columns(stored, expected):
+    """Rollup columns whose stored value disagrees with the expected one"""
+    drifted = []
+    for column in ROLLUP_COLUMNS:
+        a, b = stored[column], expected[column]
+        if isinstance(a, float) and isinstance(b, float):
+            if not math.isclose(a, b, abs_tol=CGPA_TOLERANCE):
+                drifted.append(column)
+        elif (a or None) != (b or None):
+            drifted.append(column)
+    return drifted
+
+
+def iter_rollup_drift(batch_size=BATCH_SIZE):
+    """Yield (student_id, drifted columns) for every student whose rollup disagrees with its semesters
+
+    Students and their semesters are streamed in one ordered outer join,
+    so memory stays constant for any cohort size.
+    """
+    students = Student.__table__
+    semesters = Semester.__table__
+    query = (
+        select(students.c.id, *(students.c[column] for column in ROLLUP_COLUMNS),
+               semesters.c.sgpa.label('semester_sgpa'), semesters.c.total_marks.label('semester_total'),
+               semesters.c.created_at.label('semester_created_at'))
+        .select_from(students.outerjoin(semesters, semesters.c.student_id == students.c.id))
+        .order_by(students.c.id, semesters.c.created_at, semesters.c.id)
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+    current_id, stored, rows = None, None, []
+    for row in db.session.execute(query):
+        if row[0] != current_id:
+            if current_id is not None:
+                columns = drifted_columns(stored, compute_rollup(rows))
+                if columns:
+                    yield current_id, columns
+            current_id, rows = row[0], []
+            stored = dict(zip(ROLLUP_COLUMNS, row[1:1 + len(ROLLUP_COLUMNS)]))
+        if row.semester_sgpa is not None:
+            rows.append((row.semester_sgpa, row.semester_total, row.semester_created_at))
+    if current_id is not None:
+        columns = drifted_columns(stored, compute_rollup(rows))
+        if columns:
+            yield current_id, columns
+
+
+def register_commands(app):
+    """Register the verify-rollups CLI command on the app"""
+
+    @app.cli.command('verify-rollups')
+    @click.option('--repair', is_flag=True, help='Rewrite drifted rollups from the semester rows.')
+    @click.option('--batch-size', default=BATCH_SIZE, show_default=True, help='Rows fetched per batch.')
+    def verify_rollups(repair, batch_size):
+        """Compare every student's rollup columns with its semesters."""
+        started = time.perf_counter()
+        drifted = []
+        for student_id, columns in iter_rollup_drift(batch_size):
+            if len(drifted) < 20:
+                click.echo(f"student {student_id}: {', '.join(columns)} drifted", err=True)
+            drifted.append(student_id)
+        elapsed = time.perf_counter() - started
+
+        if not drifted:
+            click.echo(f'All student rollups match their semesters ({elapsed:.1f}s)')
+            return
+        if not repair:
+            raise click.ClickException(f'{len(drifted)} student rollups drifted; rerun with --repair to rewrite them')
+        for start in range(0, len(drifted), batch_size):
+            refresh_student_rollups(db.session.connection(), drifted[start:start + batch_size])
+        db.session.commit()
+        click.echo(f'Repaired {len(drifted)} drifted student rollups in {time.perf_counter() - started:.1f}s')
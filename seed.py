@@ -0,0 +1,176 @@
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import func, insert
+
+from analytics import rebuild_cohort_aggregates
+from models import db, User, Student, Semester, SemesterMark
+from rollups import compute_rollup
+
+SUBJECTS_PER_SEMESTER = 5
+# Generated chunks submitted ahead of the writer, per worker process
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+DAYS_PER_SEMESTER = 6 * 30
+
+
+def generate_chunk(seed, chunk_index, first_student, size, subjects, max_semesters, now):
+    """Generate rows for one chunk of students (runs in a worker process)
+
+    Ids are assigned from the chunk's position so results are deterministic
+    for a given seed regardless of how many workers are used.
+    """
+    # Imported here so the web app, which only registers this command, never loads NumPy
+    import numpy as np
+    rng = np.random.default_rng([seed, chunk_index])
+    subjects = np.array(subjects)
+
+    current = rng.integers(1, max_semesters + 1, size=size)
+    student_index = np.repeat(np.arange(size), current)
+    # Semester numbers 1..current for every student, flattened
+    offsets = np.cumsum(current) - current
+    semester_number = np.arange(student_index.size) - np.repeat(offsets, current) + 1
+
+    marks = rng.integers(50, 101, size=(student_index.size, SUBJECTS_PER_SEMESTER))
+    order = rng.permuted(np.tile(np.arange(len(subjects)), (student_index.size, 1)), axis=1)
+    codes = subjects[order[:, :SUBJECTS_PER_SEMESTER]]
+    totals = marks.sum(axis=1)
+    sgpa = np.round(totals / SUBJECTS_PER_SEMESTER / 10, 2)
+    age_days = (current[student_index] - semester_number) * DAYS_PER_SEMESTER
+
+    return {
+        'chunk_index': chunk_index,
+        'first_student': first_student,
+        'current': current.tolist(),
+        'student_index': student_index.tolist(),
+        'semester_number': semester_number.tolist(),
+        'marks': marks.tolist(),
+        'codes': codes.tolist(),
+        'totals': totals.tolist(),
+        'sgpa': sgpa.tolist(),
+        'created_at': [now - timedelta(days=int(days)) for days in age_days],
+    }
+
+
+def _next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def _sync_sequences():
+    """Move PostgreSQL id sequences past the explicitly inserted ids"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for table in ('users', 'students', 'semesters'):
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+        ))
+
+
+def write_chunk(chunk, prefix, password_hash, user_base, student_base, semester_base):
+    """Bulk insert one generated chunk in a single transaction, returns the row count"""
+    first = chunk['first_student']
+    size = len(chunk['current'])
+    now = datetime.utcnow()
+
+    users = [
+        {'id': user_base + first + i, 'username': f'{prefix}{first + i:07d}',
+         'password': password_hash, 'created_at': now}
+        for i in range(size)
+    ]
+    # Semesters come out per student in created_at order, so rollups are folds over each run
+    histories = [[] for _ in range(size)]
+    for student, sgpa, total, created_at in zip(chunk['student_index'], chunk['sgpa'], chunk['totals'],
+                                                chunk['created_at']):
+        histories[student].append((sgpa, total, created_at))
+    students = [
+        dict(compute_rollup(history), id=student_base + first + i, user_id=user_base + first + i,
+             current_semester=current, created_at=now, updated_at=now)
+        for i, (current, history) in enumerate(zip(chunk['current'], histories))
+    ]
+    semester_first = semester_base + chunk['semester_offset']
+    semesters = [
+        {'id': semester_first + row, 'student_id': student_base + first + student,
+         'semester_number': number, 'sgpa': sgpa, 'total_marks': total, 'created_at': created_at,
+         'updated_at': now}
+        for row, (student, number, sgpa, total, created_at) in enumerate(zip(
+            chunk['student_index'], chunk['semester_number'], chunk['sgpa'],
+            chunk['totals'], chunk['created_at']))
+    ]
+    marks = [
+        {'semester_id': semester_first + row, 'position': position,
+         'subject_code': code, 'mark': mark}
+        for row, (codes, row_marks) in enumerate(zip(chunk['codes'], chunk['marks']))
+        for position, (code, mark) in enumerate(zip(codes, row_marks))
+    ]
+
+    db.session.execute(insert(User.__table__), users)
+    db.session.execute(insert(Student.__table__), students)
+    db.session.execute(insert(Semester.__table__), semesters)
+    db.session.execute(insert(SemesterMark.__table__), marks)
+    db.session.commit()
+    return len(users) + len(students) + len(semesters) + len(marks)
+
+
+def register_commands(app, hash_password, subjects, max_semesters):
+    """Register the seed-cohort CLI command on the app"""
+
+    @app.cli.command('seed-cohort')
+    @click.option('--students', default=1000, show_default=True, help='Number of students to create.')
+    @click.option('--seed', default=42, show_default=True, help='Random seed for reproducible cohorts.')
+    @click.option('--workers', default=4, show_default=True, help='Generator processes.')
+    @click.option('--chunk-size', default=5000, show_default=True, help='Students per bulk-insert transaction.')
+    @click.option('--prefix', default='seed', show_default=True, help='Username prefix.')
+    @click.option('--password', default='Passw0rd!', show_default=True, help='Password shared by all seeded users.')
+    def seed_cohort(students, seed, workers, chunk_size, prefix, password):
+        """Generate a synthetic cohort of users, students and semesters."""
+        from concurrent.futures import ProcessPoolExecutor
+
+        if User.query.filter(User.username.like(f'{prefix}%')).first():
+            raise click.ClickException(f"Users with prefix '{prefix}' already exist; choose another --prefix")
+
+        password_hash = hash_password(password)
+        user_base, student_base, semester_base = _next_id(User), _next_id(Student), _next_id(Semester)
+        now = datetime.utcnow()
+
+        chunk_starts = list(range(0, students, chunk_size))
+        started = time.perf_counter()
+        rows = 0
+        semester_offset = 0
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Keep a bounded window of chunks in flight so finished chunks are freed once written
+            pending = deque()
+            submissions = enumerate(chunk_starts)
+            window = max(1, workers * CHUNKS_IN_FLIGHT_PER_WORKER)
+
+            def submit_next():
+                submission = next(submissions, None)
+                if submission is not None:
+                    index, start = submission
+                    pending.append(pool.submit(generate_chunk, seed, index, start,
+                                               min(chunk_size, students - start), subjects, max_semesters, now))
+
+            for _ in range(window):
+                submit_next()
+            # Consume in order so semester ids stay deterministic
+            while pending:
+                chunk = pending.popleft().result()
+                submit_next()
+                chunk['semester_offset'] = semester_offset
+                semester_offset += len(chunk['student_index'])
+                rows += write_chunk(chunk, prefix, password_hash, user_base, student_base, semester_base)
+                elapsed = time.perf_counter() - started
+                click.echo(f"chunk {chunk['chunk_index'] + 1}/{len(chunk_starts)}: "
+                           f"{rows} rows, {rows / elapsed:,.0f} rows/sec")
+                del chunk
+
+        _sync_sequences()
+        db.session.commit()
+
+        elapsed = time.perf_counter() - started
+        click.echo(f'Seeded {students} students ({semester_offset} semesters, {rows} rows) '
+                   f'in {elapsed:.1f}s: {rows / elapsed:,.0f} rows/sec')
+
+        # Bulk inserts bypass the ORM listeners, so rebuild the cohort aggregates
+        rebuild_cohort_aggregates()
@@ -41,6 +41,50 @@ document.addEventListener('DOMContentLoaded', () => {
         if (sgpa >= 6) return 'You can do even better!';
         return "Don't give up! Every step counts!";
     }
+    // Compact (columnar) dashboard format, see compact.py
+    const DASHBOARD_FORMAT = 'application/vnd.report-card.dashboard.v1+json';
+    function expandDashboard(data) {
+        if (!data || data.v !== 1) return data;
+        const semesters = data.sgpa.map((sgpa, i) => ({
+            subjects: data.semester_subjects[i].map(idx => data.subjects[idx]),
+            marks: data.marks[i],
+            sgpa,
+            total: data.totals[i],
+            timestamp: new Date(data.created_at[i] * 1000).toISOString()
+        }));
+        return {
+            username: data.username,
+            current_semester: data.current_semester,
+            semesters,
+            marks: data.marks[data.marks.length - 1],
+            sgpa: data.sgpa[data.sgpa.length - 1],
+            cgpa: data.cgpa,
+            total_marks: data.total_marks,
+            growth: data.sgpa,
+            rank: data.rank
+        };
+    }
+    // Fetch the compact dashboard, revalidating the last copy with If-None-Match
+    function fetchDashboard() {
+        let cached = null;
+        try {
+            cached = JSON.parse(sessionStorage.getItem('dashboard') || 'null');
+        } catch (e) {
+            cached = null;
+        }
+        const headers = { 'Accept': DASHBOARD_FORMAT };
+        if (cached && cached.etag) headers['If-None-Match'] = cached.etag;
+        return fetch('/dashboard', { headers, cache: 'no-store' }).then(res => {
+            if (res.status === 304 && cached) return expandDashboard(cached.data);
+            return res.json().then(data => {
+                const etag = res.headers.get('ETag');
+                if (res.ok && etag) {
+                    sessionStorage.setItem('dashboard', JSON.stringify({ etag, data }));
+                }
+                return expandDashboard(data);
+            });
+        });
+    }
     // Render the scorecard UI
     function renderScorecard(student) {
         // SVG ring params
@@ -106,6 +150,7 @@ document.addEventListener('DOMContentLoaded', () => {
                         </svg>
                     </div>
                     <div id="sgpaMotivation" class="text-center text-base font-semibold mt-1" style="color:${color}">${getMotivation(student.sgpa)}</div>
+                    <p class="text-gray-600 mt-2">CGPA: <span class="font-semibold text-blue-700">${student.cgpa}</span></p>
                 </div>
             </div>
             <div>
@@ -144,6 +189,7 @@ document.addEventListener('DOMContentLoaded', () => {
         }, 200);
         // Logout handler
         document.getElementById('logoutBtn').onclick = () => {
+            sessionStorage.removeItem('dashboard');
             fetch('/logout', { method: 'POST' }).then(() => window.location.reload());
         };
     }
@@ -170,7 +216,7 @@ document.addEventListener('DOMContentLoaded', () => {
                         return;
                     }
                     // Fetch student data as JSON
-                    fetch('/dashboard?json=1').then(res => res.json()).then(student => {
+                    fetchDashboard().then(student => {
                         hideSection(loginSection);
                         renderScorecard(student);
                         showToast('Login successful!');
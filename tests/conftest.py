@@ -0,0 +1,46 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+from sqlalchemy import event
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'Passw0rdTest1'
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """The application module against a throwaway SQLite database, with query budgets enforced"""
+    os.environ['DATABASE_URL'] = f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+    # Cheapest bcrypt cost; calibration would make every login take ~250ms
+    os.environ['PASSWORD_HASH_ROUNDS'] = '4'
+    sys.path.insert(0, ROOT)
+    spec = importlib.util.spec_from_file_location('report_card_app', os.path.join(ROOT, 'Report-card-Dashboard.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.app.config.update(TESTING=True)
+    module.create_tables(module.app, module.db)
+    module.warm_up()
+    yield module
+    module.security_events.close()
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def statements(app_module):
+    """Running count of SQL statements sent to the database; reset it by assigning 0 to [0]"""
+    count = [0]
+
+    def record(*args):
+        count[0] += 1
+
+    with app_module.app.app_context():
+        engine = app_module.db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    yield count
+    event.remove(engine, 'before_cursor_execute', record)
@@ -0,0 +1,57 @@
+import io
+
+from analytics import rebuild_cohort_aggregates
+from conftest import PASSWORD
+from ingest import ingest_marks
+from models import CohortSgpaBucket, CohortSubjectMark
+
+STAFF_TOKEN = 'test-staff-token'
+
+
+def aggregate_snapshot():
+    """Non-empty rows of both aggregate tables, with float sums rounded away from summation order"""
+    sgpa = {
+        (row.semester_number, row.bucket): (row.count, round(row.sgpa_sum, 6), round(row.sgpa_sq_sum, 6))
+        for row in CohortSgpaBucket.query if row.count
+    }
+    marks = {(row.subject_code, row.mark): row.count for row in CohortSubjectMark.query if row.count}
+    return sgpa, marks
+
+
+def test_incremental_aggregates_match_a_full_rebuild(app_module, client):
+    # Create: registration back-fills semesters, a bump adds more
+    for username in ('agg_one', 'agg_two'):
+        client.post('/login', data={'username': username, 'password': PASSWORD, 'current_semester': '2'})
+    client.post('/login', data={'username': 'agg_one', 'password': PASSWORD, 'current_semester': '5'})
+
+    with app_module.app.app_context():
+        student = app_module.User.query.filter_by(username='agg_one').one().student
+        semesters = sorted(student.semesters, key=lambda semester: semester.semester_number)
+        # Edit: new marks (and so a new SGPA bucket), and a renamed subject
+        semesters[0].set_marks([12, 99, 47, 100, 0])
+        semesters[1].set_subjects(['CS105', 'CS104', 'CS103', 'CS102', 'CS101'])
+        semesters[1].semester_number = 7
+        # Delete
+        app_module.db.session.delete(semesters[2])
+        app_module.db.session.commit()
+
+        # Bulk ingest: updates existing marks and creates a semester
+        upload = 'username,semester_number,subject,mark\n' + ''.join(
+            f'agg_two,{number},CS10{position},{40 + 9 * position + number}\n'
+            for number in (1, 6) for position in range(1, 6))
+        report = ingest_marks(io.StringIO(upload), 'csv', app_module.CS_SUBJECTS, app_module.MAX_SEMESTERS)
+        assert report['rejected'] == 0 and report['semesters_created'] == 1
+
+        incremental = aggregate_snapshot()
+        rebuild_cohort_aggregates()
+        assert aggregate_snapshot() == incremental
+
+
+def test_cohort_analytics_requires_the_staff_token(app_module, client, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'STAFF_API_TOKEN', STAFF_TOKEN)
+    # Any unknown username registers on first login, so a student session must not be enough
+    client.post('/login', data={'username': 'agg_student', 'password': PASSWORD, 'current_semester': '1'})
+    assert client.get('/analytics/cohort').status_code == 401
+    response = client.get('/analytics/cohort', headers={'Authorization': f'Bearer {STAFF_TOKEN}'})
+    assert response.status_code == 200
+    assert response.get_json()['subjects']
@@ -0,0 +1,21 @@
+from assets import minify_css
+
+
+def test_minify_css_squeezes_rules_and_drops_comments():
+    css = '/* header */\nbody {\n    color: red;\n    margin: 0 auto ;\n}\n\na  b, c { top: 0; }\n'
+    assert minify_css(css) == 'body{color:red;margin:0 auto}a b,c{top:0}'
+
+
+def test_minify_css_leaves_quoted_strings_untouched():
+    css = ('.a::before { content: "a  ;  b {x}: /* not a comment */"; }\n'
+           ".b { font-family: 'Open  Sans', serif; background: url(\"a b.png\"); }\n"
+           '.c::after { content: "say \\"hi ,  there\\""; }')
+    assert minify_css(css) == (
+        '.a::before{content:"a  ;  b {x}: /* not a comment */"}'
+        ".b{font-family:'Open  Sans',serif;background:url(\"a b.png\")}"
+        '.c::after{content:"say \\"hi ,  there\\""}'
+    )
+
+
+def test_minify_css_comment_between_selectors_keeps_them_apart():
+    assert minify_css('a/* x */b { top: 0 }') == 'a b{top:0}'
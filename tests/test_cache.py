@@ -0,0 +1,65 @@
+import types
+
+import pytest
+
+from conftest import PASSWORD
+
+
+@pytest.fixture
+def dashboard(app_module, client, statements):
+    """Log a fresh student in and return a loader: (payload, cache hit?) for /dashboard?json=1"""
+    client.post('/login', data={'username': 'cache_student', 'password': PASSWORD, 'current_semester': '3'})
+
+    def load():
+        statements[0] = 0
+        response = client.get('/dashboard?json=1')
+        assert response.status_code == 200
+        # A hit only runs the version lookup behind the ETag
+        return response.get_json(), statements[0] == 1
+
+    return load
+
+
+def latest_semester(app_module):
+    student = app_module.User.query.filter_by(username='cache_student').one().student
+    return max(student.semesters, key=lambda semester: semester.semester_number)
+
+
+def test_unchanged_student_is_served_from_the_cache(dashboard):
+    first, hit = dashboard()
+    assert not hit
+    second, hit = dashboard()
+    assert hit and second == first
+
+
+def test_semester_edit_misses(app_module, dashboard):
+    dashboard()
+    with app_module.app.app_context():
+        latest_semester(app_module).set_marks([11, 22, 33, 44, 55])
+        app_module.db.session.commit()
+    payload, hit = dashboard()
+    assert not hit
+    assert payload['marks'] == [11, 22, 33, 44, 55]
+
+
+def test_mark_only_edit_misses(app_module, dashboard):
+    dashboard()
+    with app_module.app.app_context():
+        # Swapping two subjects changes mark rows only, not the semester's totals
+        rows = latest_semester(app_module).mark_rows
+        rows[0].subject_code, rows[1].subject_code = rows[1].subject_code, rows[0].subject_code
+        expected = [row.subject_code for row in rows]
+        app_module.db.session.commit()
+    payload, hit = dashboard()
+    assert not hit
+    assert payload['semesters'][-1]['subjects'] == expected
+
+
+def test_rank_epoch_change_misses(app_module, dashboard, monkeypatch):
+    dashboard()
+    assert dashboard()[1]
+    refresh = app_module.app.config['RANK_INDEX_REFRESH']
+    later = app_module.time.time() + refresh
+    monkeypatch.setattr(app_module, 'time', types.SimpleNamespace(time=lambda: later))
+    assert not dashboard()[1]
+    assert dashboard()[1]
@@ -0,0 +1,17 @@
+def test_forwarded_for_is_ignored_without_trusted_proxies(app_module):
+    headers = {'X-Forwarded-For': '203.0.113.9, 198.51.100.7'}
+    with app_module.app.test_request_context(headers=headers, environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+        assert app_module.get_client_ip() == '10.0.0.1'
+        assert app_module._ip_key(app_module.get_client_ip()) == 'ip:10.0.0.1'
+
+
+def test_forwarded_for_is_resolved_through_trusted_proxies(app_module, monkeypatch):
+    from werkzeug.middleware.proxy_fix import ProxyFix
+
+    monkeypatch.setattr(app_module.app, 'wsgi_app', ProxyFix(app_module.app.wsgi_app, x_for=1))
+    seen = []
+    monkeypatch.setattr(app_module.security_events, 'emit', lambda event, user, ip, details: seen.append(ip))
+    # The client-supplied first hop is spoofed; only the hop appended by the trusted proxy counts
+    app_module.app.test_client().post('/login', data={}, headers={'X-Forwarded-For': '203.0.113.9, 198.51.100.7'},
+                                      environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    assert seen == ['198.51.100.7']
@@ -0,0 +1,80 @@
+import gzip
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from compact import COMPACT_MEDIA_TYPE
+from conftest import PASSWORD
+
+REPRESENTATIONS = {
+    'html': ('/dashboard', {}),
+    'json': ('/dashboard?json=1', {}),
+    'compact': ('/dashboard', {'Accept': COMPACT_MEDIA_TYPE}),
+    'compact-gz': ('/dashboard', {'Accept': COMPACT_MEDIA_TYPE, 'Accept-Encoding': 'gzip'}),
+}
+
+
+def expand_dashboard(data):
+    """Python twin of expandDashboard() in static/scripts.js"""
+    semesters = [
+        {
+            'subjects': [data['subjects'][index] for index in data['semester_subjects'][i]],
+            'marks': data['marks'][i],
+            'sgpa': sgpa,
+            'total': data['totals'][i],
+            'timestamp': datetime.fromtimestamp(data['created_at'][i], timezone.utc).strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        for i, sgpa in enumerate(data['sgpa'])
+    ]
+    return {
+        'username': data['username'],
+        'current_semester': data['current_semester'],
+        'semesters': semesters,
+        'marks': data['marks'][-1],
+        'sgpa': data['sgpa'][-1],
+        'cgpa': data['cgpa'],
+        'total_marks': data['total_marks'],
+        'growth': data['sgpa'],
+        'rank': data['rank'],
+    }
+
+
+@pytest.fixture
+def student(client):
+    client.post('/login', data={'username': 'compact_student', 'password': PASSWORD, 'current_semester': '8'})
+    return client
+
+
+def test_compact_payload_expands_to_the_full_json(app_module, student, monkeypatch):
+    full = student.get('/dashboard?json=1').get_json()
+    # Force the gzip path regardless of the payload size
+    monkeypatch.setitem(app_module.app.config, 'DASHBOARD_GZIP_MIN_BYTES', 0)
+    plain = student.get('/dashboard', headers={'Accept': COMPACT_MEDIA_TYPE})
+    compressed = student.get('/dashboard', headers={'Accept': COMPACT_MEDIA_TYPE, 'Accept-Encoding': 'gzip'})
+
+    assert plain.mimetype == COMPACT_MEDIA_TYPE and 'Content-Encoding' not in plain.headers
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    assert len(plain.get_data()) < len(student.get('/dashboard?json=1').get_data())
+
+    expanded = expand_dashboard(json.loads(plain.get_data()))
+    # Compact timestamps are whole epoch seconds
+    for semester in full['semesters']:
+        semester['timestamp'] = semester['timestamp'][:19]
+    assert expanded == full
+
+
+def test_each_representation_has_its_own_etag_and_revalidates(student):
+    etags = {}
+    for name, (path, headers) in REPRESENTATIONS.items():
+        response = student.get(path, headers=headers)
+        assert response.status_code == 200
+        assert 'Accept' in response.vary
+        etags[name] = response.headers['ETag']
+    assert len(set(etags.values())) == len(REPRESENTATIONS)
+
+    for name, (path, headers) in REPRESENTATIONS.items():
+        assert student.get(path, headers={**headers, 'If-None-Match': etags[name]}).status_code == 304
+        other = etags['json' if name != 'json' else 'html']
+        assert student.get(path, headers={**headers, 'If-None-Match': other}).status_code == 200
@@ -0,0 +1,58 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from conftest import PASSWORD
+from models import db, Semester
+
+STAFF_TOKEN = 'test-staff-token'
+
+
+@pytest.fixture
+def staff_get(app_module, client, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'STAFF_API_TOKEN', STAFF_TOKEN)
+    for username in ('export_a', 'export_b'):
+        client.post('/login', data={'username': username, 'password': PASSWORD, 'current_semester': '4'})
+
+    def get(query):
+        response = client.get(f'/export?{query}', headers={'Authorization': f'Bearer {STAFF_TOKEN}'})
+        assert response.status_code == 200
+        return response
+    return get
+
+
+def semester_count(app_module, semester_number=None):
+    with app_module.app.app_context():
+        query = select(func.count(Semester.id))
+        if semester_number is not None:
+            query = query.where(Semester.semester_number == semester_number)
+        return db.session.scalar(query)
+
+
+def test_ndjson_export_has_one_record_per_semester(app_module, staff_get):
+    response = staff_get('format=ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(records) == semester_count(app_module)
+    assert all(len(record['subjects']) == len(record['marks']) == 5 for record in records)
+
+    assert len(staff_get('format=ndjson&semester=3').get_data(as_text=True).splitlines()) == semester_count(app_module, 3)
+
+
+def test_csv_export_has_a_header_and_one_row_per_semester(app_module, staff_get):
+    rows = list(csv.reader(io.StringIO(staff_get('format=csv').get_data(as_text=True))))
+    assert rows[0] == ['username', 'semester_number', 'subjects', 'marks', 'sgpa', 'total', 'timestamp', 'updated_at']
+    assert len(rows) - 1 == semester_count(app_module)
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'ndjson'])
+def test_gzip_export_decompresses_to_the_plain_export(staff_get, fmt):
+    plain = staff_get(f'format={fmt}').get_data()
+    response = staff_get(f'format={fmt}&gzip=1')
+    assert response.mimetype == 'application/gzip'
+    assert response.headers['Content-Disposition'].endswith(f'report-cards.{fmt}.gz')
+    assert gzip.decompress(response.get_data()) == plain
@@ -0,0 +1,91 @@
+import io
+import json
+
+from ingest import ingest_marks, validate_batch
+from conftest import PASSWORD
+
+SUBJECTS = ['CS101', 'CS102', 'CS103', 'CS104', 'CS105']
+STAFF_TOKEN = 'test-staff-token'
+
+
+def numbered(rows):
+    return list(enumerate(rows, 1))
+
+
+def test_validate_batch_reports_malformed_rows():
+    rows = numbered([
+        {'username': 'ann', 'semester_number': 2, 'subject': 'CS101', 'mark': 91},
+        {'username': 'ann', 'semester_number': '3', 'subject': 'CS102', 'mark': ' 77 '},
+        None,
+        {'username': ['ann'], 'semester_number': 1, 'subject': 'CS101', 'mark': 50},
+        {'username': 'ann', 'semester_number': {'n': 1}, 'subject': 'CS101', 'mark': 50},
+        {'username': 'ann', 'semester_number': 1, 'subject': ['CS101'], 'mark': 50},
+        {'username': 'ann', 'semester_number': 1, 'subject': 'CS101', 'mark': [50]},
+        {'username': 'ann', 'semester_number': 1, 'subject': 'CS101', 'mark': '٥٠'},
+        {'username': 'ann', 'semester_number': '²', 'subject': 'CS101', 'mark': 50},
+        {'username': 'ann', 'semester_number': 1, 'subject': 'CS101', 'mark': 50.5},
+        {'username': 'ann', 'semester_number': 1, 'subject': 'CS101', 'mark': True},
+        {'username': 'ann', 'semester_number': 1, 'subject': 'CS101', 'mark': '1234567890'},
+        {'username': 'ann', 'semester_number': 9, 'subject': 'CS101', 'mark': 50},
+        {'username': 'ann', 'semester_number': 1, 'subject': 'CS101', 'mark': 101},
+        {'semester_number': 1, 'subject': 'CS101', 'mark': 50},
+    ])
+
+    valid, errors = validate_batch(rows, SUBJECTS, 8)
+
+    assert valid == [(1, 'ann', 2, 'CS101', 91), (2, 'ann', 3, 'CS102', 77)]
+    assert sorted(errors) == [
+        (3, 'Row is not a JSON object'),
+        (4, 'Missing or invalid username'),
+        (5, 'semester_number must be an integer'),
+        (6, 'Unknown subject code'),
+        (7, 'mark must be an integer'),
+        (8, 'mark must be an integer'),
+        (9, 'semester_number must be an integer'),
+        (10, 'mark must be an integer'),
+        (11, 'mark must be an integer'),
+        (12, 'mark must be an integer'),
+        (13, 'semester_number must be between 1 and 8'),
+        (14, 'mark must be between 0 and 100'),
+        (15, 'Missing or invalid username'),
+    ]
+
+
+def test_ndjson_upload_with_nested_values_reports_row_errors(app_module, client, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'STAFF_API_TOKEN', STAFF_TOKEN)
+    client.post('/login', data={'username': 'ingest_rows', 'password': PASSWORD, 'current_semester': '1'})
+    lines = [
+        {'username': 'ingest_rows', 'semester_number': 1, 'subject': 'CS101', 'mark': 64},
+        {'username': 'ingest_rows', 'semester_number': 1, 'subject': 'CS102', 'mark': {'value': 70}},
+        {'username': 'ingest_rows', 'semester_number': [1], 'subject': 'CS103', 'mark': 70},
+    ]
+    body = '\n'.join(json.dumps(line) for line in lines) + '\nnot json\n'
+
+    response = client.post('/ingest/marks', data=body, content_type='application/x-ndjson',
+                           headers={'Authorization': f'Bearer {STAFF_TOKEN}'})
+
+    assert response.status_code == 200
+    report = response.get_json()
+    assert (report['rows'], report['accepted'], report['rejected']) == (4, 1, 3)
+    assert [error['line'] for error in report['errors']] == [2, 3, 4]
+
+
+def test_backfilled_semesters_sort_by_semester_number(app_module, client):
+    client.post('/login', data={'username': 'ingest_backfill', 'password': PASSWORD, 'current_semester': '1'})
+
+    def upload(*numbers):
+        body = 'username,semester_number,subject,mark\n' + ''.join(
+            f'ingest_backfill,{number},{subject},{50 + 5 * number}\n' for number in numbers for subject in SUBJECTS)
+        with app_module.app.app_context():
+            return ingest_marks(io.StringIO(body), 'csv', SUBJECTS, 8)
+
+    # Semester 5 first, then the ones before it in later uploads, two of them in one upload
+    assert upload(5)['semesters_created'] == 1
+    assert upload(3)['semesters_created'] == 1
+    assert upload(4, 2)['semesters_created'] == 2
+
+    with app_module.app.app_context():
+        student = app_module.User.query.filter_by(username='ingest_backfill').one().student
+        assert [semester.semester_number for semester in student.semesters] == [1, 2, 3, 4, 5]
+        assert student.get_latest_semester().semester_number == 5
+        assert student.latest_sgpa == student.semesters[-1].sgpa
@@ -0,0 +1,64 @@
+import hashlib
+import threading
+
+import pytest
+
+from passwords import PasswordHasher, HasherBusy
+from conftest import PASSWORD
+
+
+def test_timed_out_hash_keeps_its_slot_until_it_finishes():
+    hasher = PasswordHasher(rounds=4, workers=1, max_pending=0, timeout=0.05)
+    release = threading.Event()
+    try:
+        with pytest.raises(HasherBusy):
+            hasher._run(release.wait)
+        # The timed-out hash is still running on the only worker, so its slot is still taken
+        assert not hasher._slots.acquire(blocking=False)
+
+        release.set()
+        hasher._executor.submit(lambda: None).result(timeout=5)
+        assert hasher._run(lambda: 'done') == 'done'
+    finally:
+        release.set()
+        hasher.shutdown()
+
+
+def test_hash_and_verify_round_trip():
+    hasher = PasswordHasher(rounds=4)
+    try:
+        stored = hasher.hash('Passw0rdTest1')
+        assert hasher.verify(stored, 'Passw0rdTest1')
+        assert not hasher.verify(stored, 'Passw0rdTest2')
+    finally:
+        hasher.shutdown()
+
+
+def test_login_succeeds_and_defers_rehash_when_pool_is_saturated(app_module, client):
+    username = 'rehash_deferred'
+    assert client.post('/login', data={'username': username, 'password': PASSWORD,
+                                       'current_semester': '1'}).status_code == 204
+    # A legacy salted SHA-256 entry is verified inline but needs a bcrypt rehash
+    legacy = 'salt:' + hashlib.sha256((PASSWORD + 'salt').encode()).hexdigest()
+    with app_module.app.app_context():
+        user = app_module.User.query.filter_by(username=username).one()
+        user.password = legacy
+        app_module.db.session.commit()
+
+    hasher = app_module.password_hasher
+    held = 0
+    while hasher._slots.acquire(blocking=False):
+        held += 1
+    try:
+        response = client.post('/login', data={'username': username, 'password': PASSWORD, 'current_semester': '1'})
+    finally:
+        for _ in range(held):
+            hasher._slots.release()
+    assert response.status_code == 204
+    with app_module.app.app_context():
+        assert app_module.User.query.filter_by(username=username).one().password == legacy
+
+    assert client.post('/login', data={'username': username, 'password': PASSWORD,
+                                       'current_semester': '1'}).status_code == 204
+    with app_module.app.app_context():
+        assert app_module.User.query.filter_by(username=username).one().password.startswith('$2b$')
@@ -0,0 +1,42 @@
+import pytest
+
+from querycount import QueryBudgetExceeded
+from conftest import PASSWORD
+
+
+def login(client, username, semester):
+    return client.post('/login', data={'username': username, 'password': PASSWORD, 'current_semester': str(semester)})
+
+
+def test_semester_bump_and_dashboard_stay_within_budgets(app_module, client, statements):
+    assert login(client, 'budget_bump', 1).status_code == 204
+    assert statements[0] <= app_module.LOGIN_QUERY_BUDGET
+
+    # Backfilling semesters 2..8 is the most expensive login
+    statements[0] = 0
+    assert login(client, 'budget_bump', app_module.MAX_SEMESTERS).status_code == 204
+    assert statements[0] <= app_module.LOGIN_QUERY_BUDGET
+
+    statements[0] = 0
+    response = client.get('/dashboard?json=1')
+    assert response.status_code == 200
+    assert len(response.get_json()['semesters']) == app_module.MAX_SEMESTERS
+    assert statements[0] <= app_module.DASHBOARD_QUERY_BUDGET
+
+    # Cached payload: only the version lookup for the ETag
+    statements[0] = 0
+    assert client.get('/dashboard?json=1').status_code == 200
+    assert statements[0] == 1
+
+    # Unchanged refresh answered with 304 from the validators alone
+    statements[0] = 0
+    etag = response.headers['ETag']
+    assert client.get('/dashboard?json=1', headers={'If-None-Match': etag}).status_code == 304
+    assert statements[0] == 1
+
+
+def test_budget_is_enforced_under_testing(app_module, client, monkeypatch):
+    assert login(client, 'budget_enforced', 2).status_code == 204
+    monkeypatch.setattr(app_module.app.view_functions['dashboard'], 'query_budget', 0)
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/dashboard?json=1')
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from sqlalchemy import select
+
+from conftest import PASSWORD
+from models import db, Student, Semester
+from ranking import CUMULATIVE, RankIndex, leaderboard, sgpa_slot
+
+STAFF_TOKEN = 'test-staff-token'
+
+
+def sql_values(scope):
+    if scope == CUMULATIVE:
+        return db.session.scalars(select(Student.cgpa).where(Student.cgpa.isnot(None))).all()
+    return db.session.scalars(select(Semester.sgpa).where(Semester.semester_number == scope)).all()
+
+
+def assert_index_matches_sql(index, scope):
+    values = sql_values(scope)
+    slots = sorted(sgpa_slot(value) for value in values)
+    for value in set(values):
+        slot = sgpa_slot(value)
+        expected = {
+            # Ties share the best rank among them
+            'rank': 1 + sum(1 for other in slots if other > slot),
+            'percentile': round(100 * sum(1 for other in slots if other <= slot) / len(slots), 2),
+            'total': len(slots),
+        }
+        assert index.rank(scope, value) == expected
+
+
+def test_rank_index_tracks_inserts_updates_and_deletes(app_module, client):
+    index = app_module.rank_index
+    with app_module.app.app_context():
+        index.build()
+    for number, username in enumerate(['rank_a', 'rank_b', 'rank_c', 'rank_d'], 2):
+        client.post('/login', data={'username': username, 'password': PASSWORD, 'current_semester': str(number)})
+
+    with app_module.app.app_context():
+        users = {user.username: user for user in app_module.User.query.filter(
+            app_module.User.username.in_(['rank_a', 'rank_b', 'rank_c', 'rank_d']))}
+        semesters = sorted(users['rank_c'].student.semesters, key=lambda semester: semester.semester_number)
+        semesters[0].set_marks([100, 100, 100, 100, 100])
+        semesters[1].set_marks([0, 10, 20, 30, 40])
+        db.session.delete(semesters[2])
+        db.session.delete(sorted(users['rank_d'].student.semesters, key=lambda s: s.semester_number)[0])
+        db.session.commit()
+
+        for scope in [1, 2, 3, 4, 5, CUMULATIVE]:
+            assert_index_matches_sql(index, scope)
+
+        # The top of the leaderboard is the SQL ranking, best first
+        for scope in [1, CUMULATIVE]:
+            top = [entry['sgpa'] for entry in leaderboard(scope, 1, 10)]
+            best = sorted(sql_values(scope), reverse=True)[:10]
+            if scope == CUMULATIVE:
+                best = [round(value, 2) for value in best]
+            assert top == best
+
+
+def test_concurrent_maybe_refresh_starts_one_rebuild(app_module, monkeypatch):
+    index = RankIndex(refresh_interval=0)
+    builds = []
+    release = threading.Event()
+
+    def slow_build():
+        builds.append(threading.current_thread().name)
+        release.wait(5)
+
+    monkeypatch.setattr(index, 'build', slow_build)
+    callers = [threading.Thread(target=index.maybe_refresh, args=(app_module.app,)) for _ in range(16)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+    # Every caller saw the rebuild as started (or did not start one) before returning
+    assert index._refreshing
+    release.set()
+    while index._refreshing:
+        time.sleep(0.01)
+    assert len(builds) == 1
+
+
+def test_leaderboard_requires_the_staff_token(app_module, client, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'STAFF_API_TOKEN', STAFF_TOKEN)
+    client.post('/login', data={'username': 'rank_student', 'password': PASSWORD, 'current_semester': '1'})
+    assert client.get('/leaderboard').status_code == 401
+    assert client.get('/leaderboard', headers={'Authorization': f'Bearer {STAFF_TOKEN}'}).status_code == 200
@@ -0,0 +1,87 @@
+import pytest
+
+import ratelimit
+from ratelimit import MemoryBackend, RateLimiter, SQLiteBackend
+
+WINDOW = 100
+LIMIT = 5
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(ratelimit.time, 'time', lambda: now[0])
+    return now
+
+
+def test_retry_after_across_the_window_boundary(clock):
+    limiter = RateLimiter(MemoryBackend(), WINDOW)
+    for _ in range(LIMIT):
+        limiter.hit('user:a')
+    assert limiter.retry_after('user:a', LIMIT) == WINDOW + 1
+
+    # Still limited right up to the boundary, released as soon as the old window starts to fade
+    clock[0] = WINDOW - 0.1
+    assert limiter.retry_after('user:a', LIMIT) == 1
+    clock[0] = WINDOW
+    assert limiter.retry_after('user:a', LIMIT) == 1
+    clock[0] = WINDOW + 0.5
+    assert limiter.retry_after('user:a', LIMIT) == 0
+
+
+def test_previous_window_is_weighted_into_the_estimate(clock):
+    limiter = RateLimiter(MemoryBackend(), WINDOW)
+    for _ in range(3):
+        limiter.hit('user:b')
+    # Halfway through the next window the 3 old failures count as 1.5
+    clock[0] = 1.5 * WINDOW
+    for _ in range(3):
+        limiter.hit('user:b')
+    assert limiter.retry_after('user:b', LIMIT) == 0
+
+    limiter.hit('user:b')
+    wait = limiter.retry_after('user:b', LIMIT)
+    assert wait == 17
+    clock[0] += wait
+    assert limiter.retry_after('user:b', LIMIT) == 0
+
+    # Two full windows later nothing is left
+    clock[0] = 4 * WINDOW
+    assert limiter.retry_after('user:b', LIMIT) == 0
+
+
+def test_memory_backend_evicts_the_keys_closest_to_expiry_at_max_keys(clock):
+    limiter = RateLimiter(MemoryBackend(max_keys=3), WINDOW)
+    for index, key in enumerate(['k1', 'k2', 'k3', 'k4', 'k5']):
+        clock[0] = index
+        limiter.hit(key)
+    assert limiter.size() == 3
+    assert [limiter.backend.get(key) is not None for key in ['k1', 'k2', 'k3', 'k4', 'k5']] == \
+        [False, False, True, True, True]
+
+    # A write refreshes a key's expiry, so it moves to the back of the eviction order
+    clock[0] = 5
+    limiter.hit('k3')
+    limiter.hit('k6')
+    assert [limiter.backend.get(key) is not None for key in ['k3', 'k4', 'k5', 'k6']] == [True, False, True, True]
+
+
+def test_memory_backend_drops_expired_keys(clock):
+    limiter = RateLimiter(MemoryBackend(max_keys=10), WINDOW)
+    limiter.hit('old')
+    clock[0] = 2 * WINDOW
+    limiter.hit('new')
+    assert limiter.size() == 1
+    assert limiter.retry_after('old', 1) == 0
+
+
+def test_sqlite_backend_holds_at_most_max_keys(tmp_path, clock):
+    limiter = RateLimiter(SQLiteBackend(str(tmp_path / 'limits.db'), max_keys=3), WINDOW)
+    for index in range(6):
+        clock[0] = index
+        limiter.hit(f'k{index}')
+        assert limiter.size() == min(index + 1, 3)
+    # Updating an existing key never evicts another one
+    limiter.hit('k5')
+    assert limiter.size() == 3
+    assert limiter.backend.get('k3') is not None
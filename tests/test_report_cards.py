@@ -0,0 +1,52 @@
+import pytest
+
+from conftest import PASSWORD
+
+STAFF_TOKEN = 'test-staff-token'
+
+
+@pytest.fixture
+def staff_headers(app_module, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'STAFF_API_TOKEN', STAFF_TOKEN)
+    return {'Authorization': f'Bearer {STAFF_TOKEN}', 'Content-Type': 'application/json'}
+
+
+@pytest.mark.parametrize('field', ['cursor', 'limit', 'current_semester'])
+def test_out_of_range_floats_are_rejected(client, staff_headers, field):
+    # 1e400 parses to float('inf'), which int() cannot convert
+    response = client.post('/report-cards', data=f'{{"{field}": 1e400}}', headers=staff_headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('body', ['{"student_ids": [1, -1e400]}', '{"student_ids": [100000000000000000000]}',
+                                  '{"cursor": 100000000000000000000}'])
+def test_out_of_range_ids_are_rejected(client, staff_headers, body):
+    response = client.post('/report-cards', data=body, headers=staff_headers)
+    assert response.status_code == 400
+
+
+def test_usernames_and_student_ids_select_the_union(app_module, client, staff_headers):
+    usernames = [f'rc_union_{index}' for index in range(6)]
+    for username in usernames:
+        assert client.post('/login', data={'username': username, 'password': PASSWORD,
+                                           'current_semester': '2'}).status_code == 204
+    with app_module.app.app_context():
+        ids = {user.username: user.student.id for user in app_module.User.query.filter(
+            app_module.User.username.in_(usernames))}
+    by_name, by_id = usernames[:2], [ids[username] for username in usernames[3:5]]
+
+    pages, cursor = [], None
+    while True:
+        body = {'usernames': by_name, 'student_ids': by_id, 'limit': 1}
+        if cursor is not None:
+            body['cursor'] = cursor
+        response = client.post('/report-cards', json=body, headers=staff_headers)
+        assert response.status_code == 200
+        page = response.get_json()
+        pages.extend(card['student_id'] for card in page['report_cards'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    # Keyset order over both sets, each student exactly once
+    assert pages == sorted([ids[username] for username in by_name] + by_id)